@@ -0,0 +1,186 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+
+from . import cache as info_cache
+from . import conditional
+from . import search
+from . import services
+from . import projection
+from .authentication import CachedJWTAuthentication
+from .pagination import KeysetPagination, SearchPagination
+from .renderers import FastJSONRenderer
+from .serializers import InfoSerializer
+
+# ASGI-native counterparts of InfoList and InfoDetail. They run on the event
+# loop end to end (async JWT authentication, async cache and ORM calls) and
+# return the same bodies, headers and status codes as the DRF views.
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json',
+        status=status_code,
+        headers=headers,
+    )
+
+
+class AsyncAPIView(View):
+    authentication = CachedJWTAuthentication()
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Wrap the request in DRF's Request for query_params and data; the
+        # ASGI handler has already buffered the body, so parsing never blocks.
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            result = await self.authentication.aauthenticate(request)
+            if result is None:
+                raise NotAuthenticated()
+            request.user, request.auth = result
+            self.request = request
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            headers = None
+            if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+                headers = {'WWW-Authenticate': self.authentication.authenticate_header(request)}
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return render(data, exc.status_code, headers)
+
+
+class AsyncInfoList(AsyncAPIView):
+
+    async def get(self, request):
+        cache_key = await info_cache.alist_key(request.user.pk, request.build_absolute_uri())
+        entry = await info_cache.aget(cache_key)
+        if entry is not None:
+            etag = entry['etag']
+        else:
+            etag = await conditional.alist_etag(services.notes_for(request.user), request)
+
+        not_modified = conditional.evaluate(request, etag)
+        if not_modified:
+            return not_modified
+        if entry is not None:
+            return render(entry['data'], headers={'X-Cache': 'HIT', 'ETag': etag})
+
+        fields = request.query_params.get('fields')
+        if fields:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = set(fields) - set(InfoSerializer.Meta.fields)
+            if unknown:
+                return render({
+                    'error': f"Unknown fields: {', '.join(sorted(unknown))}"
+                }, status.HTTP_400_BAD_REQUEST)
+        else:
+            fields = None
+
+        query = request.query_params.get('q', '').strip()
+        if query:
+            info = services.notes_for(request.user).select_related('user')
+            if fields is not None and 'text' not in fields:
+                info = info.defer('text')
+            paginator = SearchPagination()
+            page = await paginator.apaginate_queryset(search.search(info, query), request, view=self)
+            results = InfoSerializer(page, many=True, fields=fields).data
+            for item, match in zip(results, page):
+                item['rank'] = match.rank
+                item['snippet'] = search.highlight(match.snippet)
+            data = paginator.get_paginated_response(results).data
+        else:
+            names = projection.field_names(fields)
+            paginator = KeysetPagination()
+            page = await paginator.apaginate_queryset(projection.project(services.notes_for(request.user), names), request, view=self)
+            data = projection.Projected(paginator.get_paginated_response(projection.to_dicts(page, names)).data)
+        await info_cache.aset(cache_key, {'data': data, 'etag': etag})
+        return render(data, headers={'X-Cache': 'MISS', 'ETag': etag})
+
+    async def post(self, request):
+        serializer = InfoSerializer(data=request.data)
+        if serializer.is_valid():
+            info = await sync_to_async(services.create_note)(request.user, **serializer.validated_data)
+            return render({
+                'message': 'Info created successfully',
+                'data': InfoSerializer(info).data
+            }, status.HTTP_201_CREATED)
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncInfoDetail(AsyncAPIView):
+
+    async def get(self, request, pk):
+        cache_key = await info_cache.adetail_key(request.user.pk, pk)
+        data = await info_cache.aget(cache_key)
+        if data is not None:
+            updated_at = data['updated_at']
+        else:
+            names = projection.field_names()
+            row = await projection.project(services.notes_for(request.user).filter(pk=pk), names).afirst()
+            if not row:
+                return render({
+                    'error': 'Info not found'
+                }, status.HTTP_404_NOT_FOUND)
+            updated_at = row.updated_at
+
+        etag = conditional.detail_etag(pk, updated_at)
+        not_modified = conditional.evaluate(request, etag, updated_at)
+        if not_modified:
+            return not_modified
+
+        headers = conditional.validator_headers(etag, updated_at)
+        if data is not None:
+            return render(data, headers={'X-Cache': 'HIT', **headers})
+
+        data = projection.Projected(projection.to_dicts([row], names)[0])
+        await info_cache.aset(cache_key, data)
+        return render(data, headers={'X-Cache': 'MISS', **headers})
+
+    def write(self, request, pk, apply):
+        # Writes run in a worker thread, in one transaction with the locked
+        # row that the If-Match precondition is checked against.
+        with transaction.atomic():
+            info = services.get_note(request.user, pk, lock=True)
+            if not info:
+                return render({
+                    'error': 'Info not found'
+                }, status.HTTP_404_NOT_FOUND)
+
+            precondition_failed = conditional.evaluate(request, conditional.detail_etag(info.pk, info.updated_at), info.updated_at)
+            if precondition_failed:
+                return precondition_failed
+            return apply(request, info)
+
+    def update(self, request, info):
+        serializer = InfoSerializer(info, data=request.data, partial=True)
+        if serializer.is_valid():
+            services.update_note(info, **serializer.validated_data)
+            return render({
+                'message': 'Info updated successfully',
+                'data': InfoSerializer(info).data
+            }, headers=conditional.validator_headers(
+                conditional.detail_etag(info.pk, info.updated_at), info.updated_at))
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    def destroy(self, request, info):
+        services.delete_note(info)
+        return render({
+            'message': 'Info deleted successfully'
+        }, status.HTTP_204_NO_CONTENT)
+
+    async def put(self, request, pk):
+        return await sync_to_async(self.write)(request, pk, self.update)
+
+    async def delete(self, request, pk):
+        return await sync_to_async(self.write)(request, pk, self.destroy)
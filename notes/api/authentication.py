@@ -0,0 +1,106 @@
+import copy
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    # Per-process, thread-safe TTL cache of User rows keyed by id. Saves and
+    # deletes in this process evict immediately; other processes pick the
+    # change up within JWT_USER_CACHE_TTL seconds.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    # Token claims carry the id as a string, model instances as an int.
+    def get(self, user_id):
+        entry = self._entries.get(str(user_id))
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return copy.copy(entry[1])
+
+    def set(self, user_id, user):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= settings.JWT_USER_CACHE_SIZE:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+                if len(self._entries) >= settings.JWT_USER_CACHE_SIZE:
+                    self._entries.clear()
+            self._entries[str(user_id)] = (now + settings.JWT_USER_CACHE_TTL, copy.copy(user))
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # JWTAuthentication that serves the token's user from user_cache instead
+    # of loading it on every request. Misses go through the stock lookup, so
+    # unknown and inactive users are rejected exactly as before.
+
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            self.cache_user(validated_token, user)
+        return user
+
+    # Async counterpart used by the ASGI views in async_views.py. Token
+    # validation is pure CPU; only a user cache miss leaves the event loop.
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+            self.cache_user(validated_token, user)
+        return user
+
+    def get_cached_user(self, validated_token):
+        if not settings.JWT_USER_CACHE_TTL:
+            return None
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is not None and api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+    def cache_user(self, validated_token, user):
+        if settings.JWT_USER_CACHE_TTL:
+            user_cache.set(validated_token[api_settings.USER_ID_CLAIM], user)
@@ -0,0 +1,504 @@
+import asyncio
+import random
+import statistics
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from notes import compression, fields
+from . import cache as info_cache
+from . import projection
+from . import services
+from .authentication import user_cache
+from .models import Info
+from .pagination import encode_cursor
+from .renderers import FastJSONRenderer
+from .serializers import InfoSerializer
+
+# Scenario registry used by the ``benchmark`` management command. A scenario
+# receives a Bench for one collection size and returns ``step(i)``; each step
+# does its untimed preparation and returns the request to time.
+SCENARIOS = {}
+
+PASSWORD = 'Bench@Pass123'
+
+
+def scenario(name, iterations=None, sizes=None):
+    def register(func):
+        SCENARIOS[name] = {'func': func, 'iterations': iterations, 'sizes': sizes}
+        return func
+    return register
+
+
+class Bench:
+
+    def __init__(self, size):
+        self.size = size
+        self.user = User.objects.create_user(username=f'bench{size}', email=f'bench{size}@example.com', password=PASSWORD)
+        self.seed()
+        self.info = Info.objects.filter(user=self.user).first()
+
+        token = RefreshToken.for_user(self.user).access_token
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.async_api = AsyncClient()
+        self.async_headers = {'Authorization': f'Bearer {token}'}
+        self.web = Client()
+        self.web.force_login(self.user)
+
+    def seed(self, batch_size=5000):
+        for start in range(0, self.size, batch_size):
+            count = min(batch_size, self.size - start)
+            Info.objects.bulk_create(
+                Info(user=self.user, title=f'Note {start + i}', text=f'Benchmark note {start + i} ' * 20)
+                for i in range(count)
+            )
+
+
+def measure(step, iterations):
+    # One untimed warm-up request, so per-process caches (users, URL
+    # resolvers, templates) do not show up as an extra query on the first run.
+    step(-1)()
+    timings, queries = [], 0
+    for i in range(iterations):
+        request = step(i)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request()
+            timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.status_code}: {response.content[:200]!r}')
+        queries = max(queries, len(captured))
+
+    # Allocations are measured on a separate run so tracing does not skew the
+    # latencies above.
+    request = step(iterations)
+    tracemalloc.start()
+    request()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'queries': queries,
+        'alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance, noise_ms=1.0):
+    # Query counts must not grow at all. The median latency and allocations
+    # may drift by ``tolerance`` (a fraction) before they count as a
+    # regression; latency differences under ``noise_ms`` are ignored. p99
+    # from a few dozen samples is mostly scheduler noise, so it is reported
+    # but never gated on.
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{key}: {result['queries']} queries, baseline {expected['queries']}")
+        if result['p50_ms'] > expected['p50_ms'] * (1 + tolerance) and result['p50_ms'] - expected['p50_ms'] > noise_ms:
+            regressions.append(f"{key}: p50_ms {result['p50_ms']}, baseline {expected['p50_ms']}")
+        if result['alloc_kb'] > expected['alloc_kb'] * (1 + tolerance):
+            regressions.append(f"{key}: alloc_kb {result['alloc_kb']}, baseline {expected['alloc_kb']}")
+    return regressions
+
+
+def load(url, token, connections, duration):
+    # Closed-loop HTTP/1.1 load generator for a running server (used by the
+    # ``loadtest`` command): ``connections`` keep-alive sockets each issue
+    # GETs back to back for ``duration`` seconds.
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+        f'Authorization: Bearer {token}\r\nConnection: keep-alive\r\n\r\n'
+    ).encode()
+    timings, errors = [], {}
+
+    async def worker(deadline):
+        try:
+            reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        except OSError as error:
+            errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+            return
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                writer.write(request)
+                status_line = await reader.readline()
+                length = 0
+                while (line := await reader.readline()) not in (b'\r\n', b''):
+                    name, _, value = line.partition(b':')
+                    if name.lower() == b'content-length':
+                        length = int(value)
+                await reader.readexactly(length)
+                status = status_line.split()[1].decode() if status_line else 'closed'
+                if status != '200':
+                    errors[status] = errors.get(status, 0) + 1
+                    if status == 'closed':
+                        return
+                else:
+                    timings.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError) as error:
+            errors[type(error).__name__] = errors.get(type(error).__name__, 0) + 1
+        finally:
+            writer.close()
+
+    async def run():
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(worker(deadline) for _ in range(connections)))
+
+    async_to_sync(run)()
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive') if len(timings) > 1 else [0] * 99
+    return {
+        'requests': len(timings),
+        'rps': round(len(timings) / duration, 1),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'errors': errors,
+    }
+
+
+
+WORDS = (
+    'the of and to in is that for it as was with be by on not he this are or his from at which but have an they '
+    'you were her she there been one all we their has would when if so no will can more other what about out up '
+    'meeting notes draft idea todo review budget travel recipe garden project deadline follow call email list'
+).split()
+
+
+def list_payload(size):
+    # An info list response body of roughly ``size`` bytes, rendered the way
+    # InfoList renders it.
+    now = timezone.now()
+    words = random.Random(size)
+    results, length, i = [], 0, 0
+    while length < size:
+        item = {
+            'id': i, 'title': f'Note {i}',
+            'text': ' '.join(words.choices(WORDS, k=40)),
+            'user': 'bench', 'created_at': now, 'updated_at': now,
+        }
+        results.append(item)
+        length += len(FastJSONRenderer().render(projection.Projected(item)))
+        i += 1
+    return FastJSONRenderer().render(projection.Projected({'next': None, 'results': results}))
+
+
+def compression_costs(payload, repeats):
+    # Compressed size and median CPU time of each installed codec at its
+    # configured level.
+    costs = {}
+    for name in settings.COMPRESSION_ENCODINGS:
+        codec = compression.CODECS[name]
+        if not codec.available():
+            continue
+        timings = []
+        for _ in range(repeats):
+            start = time.process_time()
+            content = codec.compress(payload, padded=False)
+            timings.append(time.process_time() - start)
+        costs[name] = {'bytes': len(content), 'cpu_ms': round(statistics.median(timings) * 1000, 3)}
+    return costs
+
+
+def log_body(size):
+    # A pasted application log of roughly ``size`` characters, the kind of
+    # body compression at rest is for.
+    lines = random.Random(size)
+    parts, length, i = [], 0, 0
+    while length < size:
+        line = (f'2024-05-{i % 28 + 1:02d} 12:{i % 60:02d}:{lines.randrange(60):02d} '
+                f'{lines.choice(["INFO", "INFO", "WARN", "DEBUG"])} worker-{lines.randrange(8)} '
+                f'{" ".join(lines.choices(WORDS, k=8))} in {lines.randrange(500)} ms\n')
+        parts.append(line)
+        length += len(line)
+        i += 1
+    return ''.join(parts)[:size]
+
+
+def text_storage_costs(text, repeats):
+    # Stored size and median CPU time to write and read ``text`` with each
+    # installed codec of notes.fields.
+    data = text.encode()
+    costs = {'plain': {'bytes': len(data), 'write_ms': 0.0, 'read_ms': 0.0}}
+    for name, codec in fields.CODECS.items():
+        if not codec.available():
+            continue
+        with override_settings(COMPRESSED_TEXT_CODEC=name):
+            writes, reads = [], []
+            for _ in range(repeats):
+                start = time.process_time()
+                stored = fields.compress(text)
+                writes.append(time.process_time() - start)
+                start = time.process_time()
+                fields.decompress(stored)
+                reads.append(time.process_time() - start)
+        costs[name] = {
+            'bytes': len(stored),
+            'write_ms': round(statistics.median(writes) * 1000, 3),
+            'read_ms': round(statistics.median(reads) * 1000, 3),
+        }
+    return costs
+
+
+@scenario('register', iterations=5, sizes=[10])
+def register(bench):
+    def step(i):
+        data = {'username': f'new{time.perf_counter_ns()}', 'email': f'new{i}{time.perf_counter_ns()}@example.com', 'password': PASSWORD}
+        return lambda: bench.api.post(reverse('api-register'), data, format='json')
+    return step
+
+
+@scenario('login', iterations=5, sizes=[10])
+def login(bench):
+    def step(i):
+        data = {'username': bench.user.username, 'password': PASSWORD}
+        return lambda: bench.api.post(reverse('api-login'), data, format='json')
+    return step
+
+
+@scenario('token_refresh')
+def token_refresh(bench):
+    def step(i):
+        data = {'refresh': str(RefreshToken.for_user(bench.user))}
+        return lambda: bench.api.post(reverse('token_refresh'), data, format='json')
+    return step
+
+
+@scenario('info_list')
+def info_list(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-list'))
+    return step
+
+
+@scenario('info_list_async')
+def info_list_async(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: async_to_sync(bench.async_api.get)(reverse('async-info-list'), headers=bench.async_headers)
+    return step
+
+
+@scenario('info_list_gzip')
+def info_list_gzip(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-list'), headers={'Accept-Encoding': 'gzip'})
+    return step
+
+
+@scenario('info_list_cached')
+def info_list_cached(bench):
+    bench.api.get(reverse('info-list'))
+    return lambda i: lambda: bench.api.get(reverse('info-list'))
+
+
+@scenario('info_list_deep_page')
+def info_list_deep_page(bench):
+    last = Info.objects.filter(user=bench.user).order_by('updated_at', 'id').first()
+    cursor = encode_cursor(last.updated_at, last.pk + 1)
+
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-list'), {'cursor': cursor})
+    return step
+
+
+@scenario('export_ndjson')
+def export_ndjson(bench):
+    # Consumes the stream chunk by chunk, so alloc_kb shows the peak held at
+    # once, which should not grow with the collection size.
+    def request():
+        response = bench.api.get(reverse('info-export'), {'output': 'ndjson'})
+        for _ in response.streaming_content:
+            pass
+        return response
+    return lambda i: request
+
+
+@scenario('import_ndjson', iterations=5, sizes=[10])
+def import_ndjson(bench):
+    body = b''.join(
+        JSONRenderer().render({'title': f'Imported {i}', 'text': f'Imported note {i} ' * 20}) + b'\n'
+        for i in range(5000)
+    )
+
+    def request():
+        response = bench.api.generic('POST', reverse('info-import'), body, content_type='application/x-ndjson')
+        for _ in response.streaming_content:
+            pass
+        return response
+    return lambda i: request
+
+
+# Serialization and rendering of 10k already-fetched rows, without the
+# query: the serializer with JSONRenderer against the values_list()
+# projection with FastJSONRenderer. The 1000 seeded rows are repeated.
+@scenario('serialize_10k_serializer', iterations=10, sizes=[1000])
+def serialize_10k_serializer(bench):
+    rows = list(Info.objects.filter(user=bench.user).select_related('user')) * 10
+
+    def request():
+        return HttpResponse(JSONRenderer().render({'next': None, 'results': InfoSerializer(rows, many=True).data}))
+    return lambda i: request
+
+
+@scenario('serialize_10k_projection', iterations=10, sizes=[1000])
+def serialize_10k_projection(bench):
+    names = projection.field_names()
+    rows = list(projection.project(Info.objects.filter(user=bench.user), names)) * 10
+
+    def request():
+        data = projection.Projected({'next': None, 'results': projection.to_dicts(rows, names)})
+        return HttpResponse(FastJSONRenderer().render(data))
+    return lambda i: request
+
+
+@scenario('info_detail')
+def info_detail(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-detail', args=[bench.info.pk]))
+    return step
+
+
+@scenario('info_detail_large')
+def info_detail_large(bench):
+    # A 1 MB log, stored compressed; compare with info_detail_large_plain.
+    info = Info.objects.create(user=bench.user, title='Log', text=log_body(1024 * 1024))
+
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-detail', args=[info.pk]))
+    return step
+
+
+@scenario('info_detail_large_plain')
+def info_detail_large_plain(bench):
+    with override_settings(COMPRESSED_TEXT_MIN_SIZE=float('inf')):
+        info = Info.objects.create(user=bench.user, title='Log', text=log_body(1024 * 1024))
+
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.api.get(reverse('info-detail', args=[info.pk]))
+    return step
+
+
+@scenario('info_detail_async')
+def info_detail_async(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: async_to_sync(bench.async_api.get)(
+            reverse('async-info-detail', args=[bench.info.pk]), headers=bench.async_headers)
+    return step
+
+
+@scenario('info_detail_auth_cold')
+def info_detail_auth_cold(bench):
+    # Same as info_detail but without the authentication user cache, to show
+    # what CachedJWTAuthentication saves per request.
+    def step(i):
+        info_cache.get_cache().clear()
+        user_cache.clear()
+        return lambda: bench.api.get(reverse('info-detail', args=[bench.info.pk]))
+    return step
+
+
+@scenario('info_detail_connect')
+def info_detail_connect(bench):
+    # info_detail with the connection dropped before every request, which is
+    # what each request pays with DB_CONN_MAX_AGE=0 (with DB_POOL=True the
+    # close hands it back to the pool instead). Compare with info_detail
+    # against PostgreSQL; SQLite's in-memory test database ignores close().
+    def step(i):
+        info_cache.get_cache().clear()
+        connection.close()
+        return lambda: bench.api.get(reverse('info-detail', args=[bench.info.pk]))
+    return step
+
+
+@scenario('info_create')
+def info_create(bench):
+    data = {'title': 'Benchmark', 'text': 'Created by the benchmark'}
+    return lambda i: lambda: bench.api.post(reverse('info-list'), data, format='json')
+
+
+@scenario('info_update')
+def info_update(bench):
+    def step(i):
+        return lambda: bench.api.put(reverse('info-detail', args=[bench.info.pk]), {'title': f'Updated {i}'}, format='json')
+    return step
+
+
+def revised_note(bench, edits):
+    # A long note edited ``edits`` times, one paragraph per edit.
+    lines = [f'Paragraph {i} of a long benchmark note. ' * 4 + '\n' for i in range(200)]
+    info = Info.objects.create(user=bench.user, title='Revised', text=''.join(lines))
+    for n in range(edits):
+        lines[n % len(lines)] = f'Edited paragraph {n}.\n'
+        services.update_note(info, text=''.join(lines))
+    return info, lines
+
+
+@scenario('info_update_revised')
+def info_update_revised(bench):
+    info, lines = revised_note(bench, 0)
+
+    def step(i):
+        lines[i % len(lines)] = f'Benchmark edit {i}.\n'
+        data = {'text': ''.join(lines)}
+        return lambda: bench.api.put(reverse('info-detail', args=[info.pk]), data, format='json')
+    return step
+
+
+@scenario('info_revision_detail')
+def info_revision_detail(bench):
+    # Revision 1 sits furthest from the next snapshot: the slowest rebuild.
+    info, _ = revised_note(bench, 2 * settings.INFO_REVISION_SNAPSHOT_EVERY)
+    return lambda i: lambda: bench.api.get(reverse('info-revision-detail', args=[info.pk, 1]))
+
+
+@scenario('info_delete')
+def info_delete(bench):
+    def step(i):
+        info = Info.objects.create(user=bench.user, title='Delete me', text='Body')
+        return lambda: bench.api.delete(reverse('info-detail', args=[info.pk]))
+    return step
+
+
+@scenario('notes_list')
+def notes_list(bench):
+    return lambda i: lambda: bench.web.get(reverse('notes.list'))
+
+
+@scenario('notes_list_cold')
+def notes_list_cold(bench):
+    def step(i):
+        info_cache.get_cache().clear()
+        return lambda: bench.web.get(reverse('notes.list'))
+    return step
+
+
+@scenario('notes_detail')
+def notes_detail(bench):
+    return lambda i: lambda: bench.web.get(reverse('notes.detail', args=[bench.info.pk]))
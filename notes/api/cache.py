@@ -0,0 +1,108 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+# Every cached response is keyed on the owner's current version number.
+# Writes bump the version, which orphans all of that user's entries at once;
+# the orphans simply age out through INFO_CACHE_TIMEOUT.
+#
+# Only a cache shared by every worker (Redis, memcached, the database) sees
+# all the bumps. A process-local LocMemCache would keep serving a worker's
+# stale entries after another worker's write, so responses are only cached
+# there when INFO_CACHE_SINGLE_PROCESS says no other worker exists.
+
+
+def get_cache():
+    return caches[settings.INFO_CACHE_ALIAS]
+
+
+def enabled():
+    return settings.INFO_CACHE_SINGLE_PROCESS or not isinstance(get_cache(), LocMemCache)
+
+
+def _version_key(user_id):
+    return f'info:version:{user_id}'
+
+
+def get_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1 so a version that was evicted
+        # can never come back with a number that old entries still use.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(user_id):
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(user_id):
+    def bump():
+        cache = get_cache()
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            cache.add(_version_key(user_id), time.time_ns(), timeout=None)
+    transaction.on_commit(bump)
+
+
+def _list_key(user_id, version, url):
+    digest = hashlib.md5(url.encode(), usedforsecurity=False).hexdigest()
+    return f'info:{user_id}:{version}:list:{digest}'
+
+
+def list_key(user_id, url):
+    return _list_key(user_id, get_version(user_id), url)
+
+
+async def alist_key(user_id, url):
+    return _list_key(user_id, await aget_version(user_id), url)
+
+
+def state_key(user_id):
+    return f'info:{user_id}:{get_version(user_id)}:state'
+
+
+async def astate_key(user_id):
+    return f'info:{user_id}:{await aget_version(user_id)}:state'
+
+
+def detail_key(user_id, pk):
+    return f'info:{user_id}:{get_version(user_id)}:detail:{pk}'
+
+
+async def adetail_key(user_id, pk):
+    return f'info:{user_id}:{await aget_version(user_id)}:detail:{pk}'
+
+
+def get(key):
+    return get_cache().get(key) if enabled() else None
+
+
+async def aget(key):
+    return await get_cache().aget(key) if enabled() else None
+
+
+def set(key, data):
+    if enabled():
+        get_cache().set(key, data, timeout=settings.INFO_CACHE_TIMEOUT)
+
+
+async def aset(key, data):
+    if enabled():
+        await get_cache().aset(key, data, timeout=settings.INFO_CACHE_TIMEOUT)
+
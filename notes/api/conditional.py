@@ -0,0 +1,77 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+from . import cache as info_cache
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_datetime(value):
+    # Cached responses hold updated_at already rendered by the serializer.
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def _microseconds(value):
+    return (_as_datetime(value) - EPOCH) // timedelta(microseconds=1)
+
+
+def detail_etag(pk, updated_at):
+    return f'"{pk}-{_microseconds(updated_at)}"'
+
+
+def _list_etag(state, request):
+    last = _microseconds(state['last']) if state['last'] else 0
+    params = hashlib.md5(request.query_params.urlencode().encode(), usedforsecurity=False).hexdigest()[:12]
+    return f'W/"{state["count"]}-{last}-{params}"'
+
+
+def list_etag(queryset, request):
+    # The row count costs a scan of the user's index entries, so it is
+    # computed once per cache version and shared by every page, when
+    # responses are cached at all (see api.cache.enabled).
+    key = info_cache.state_key(request.user.pk)
+    state = info_cache.get(key)
+    if state is None:
+        state = queryset.aggregate(count=Count('id'), last=Max('updated_at'))
+        info_cache.set(key, state)
+    return _list_etag(state, request)
+
+
+async def alist_etag(queryset, request):
+    key = await info_cache.astate_key(request.user.pk)
+    state = await info_cache.aget(key)
+    if state is None:
+        state = await queryset.aaggregate(count=Count('id'), last=Max('updated_at'))
+        await info_cache.aset(key, state)
+    return _list_etag(state, request)
+
+
+def last_modified(updated_at):
+    return int(_as_datetime(updated_at).timestamp())
+
+
+def evaluate(request, etag, updated_at=None):
+    # Returns a 304 or 412 response when the request's preconditions say so,
+    # otherwise None and the view carries on.
+    if_match = request.META.get('HTTP_IF_MATCH')
+    if if_match and 'W/' in if_match:
+        # Compressed responses carry our strong ETags in weak form (see
+        # notes.compression); echoed back they still name the same version.
+        request.META['HTTP_IF_MATCH'] = if_match.replace('W/', '')
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified(updated_at) if updated_at else None,
+    )
+
+
+def validator_headers(etag, updated_at=None):
+    headers = {'ETag': etag}
+    if updated_at:
+        headers['Last-Modified'] = http_date(last_modified(updated_at))
+    return headers
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.utils.text import compress_sequence
+from rest_framework.renderers import JSONRenderer
+
+from . import services
+from .serializers import InfoSerializer
+
+# Streaming export of a user's whole collection. Rows are read with
+# iterator(chunk_size=...) and encoded one at a time, so memory use depends
+# on EXPORT_CHUNK_SIZE and EXPORT_BUFFER_SIZE, not on the number of notes.
+
+FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def rows(user):
+    serializer = InfoSerializer()
+    queryset = services.notes_for(user).order_by('id')
+    for info in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        # Every row belongs to ``user``; attach it rather than joining it in.
+        info.user = user
+        yield serializer.to_representation(info)
+
+
+def encode(items, fmt):
+    renderer = JSONRenderer()
+    if fmt == 'ndjson':
+        for item in items:
+            yield renderer.render(item) + b'\n'
+        return
+
+    yield b'['
+    separator = b''
+    for item in items:
+        yield separator + renderer.render(item)
+        separator = b','
+    yield b']'
+
+
+def buffered(chunks):
+    # Coalesces the per-row pieces into larger writes; gzip in particular
+    # flushes (and compresses poorly) on every chunk it is handed.
+    buffer, size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= settings.EXPORT_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def stream(user, fmt, gzip=False):
+    content = buffered(encode(rows(user), fmt))
+    return compress_sequence(content) if gzip else content
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.http import HttpResponse
+from rest_framework.exceptions import Throttled
+
+# PBKDF2 iteration counts selectable through PASSWORD_HASH_PROFILE. Raising
+# or lowering the cost is safe: Django re-hashes a password at the new cost
+# the next time its owner logs in.
+PROFILES = {
+    'strong': PBKDF2PasswordHasher.iterations,
+    'standard': 600_000,
+    # Only for development and test databases.
+    'fast': 1_000,
+}
+
+
+class HashingBusy(Throttled):
+    status_code = 503
+    default_detail = 'Too many sign-ins in progress, try again shortly.'
+    default_code = 'hashing_busy'
+
+
+class HashingBusyMiddleware:
+    # DRF views answer HashingBusy themselves; this gives the HTML login,
+    # signup and admin pages the same 503 instead of a server error.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingBusy):
+            return HttpResponse(exception.detail, content_type='text/plain', status=exception.status_code,
+                                headers={'Retry-After': str(exception.wait)})
+
+
+class HashingPool:
+    # Runs password hashing on a fixed number of threads. At most
+    # PASSWORD_HASH_QUEUE calls may wait for a thread; beyond that callers
+    # fail fast with HashingBusy instead of tying up their request worker.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                self._slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def run(self, func, *args):
+        if self._executor is None:
+            self._start()
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(wait=1)
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+
+hashing_pool = HashingPool()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    # Drop-in replacement for Django's default hasher (same algorithm name,
+    # so existing hashes verify) that does the work on hashing_pool.
+
+    @property
+    def iterations(self):
+        return PROFILES[settings.PASSWORD_HASH_PROFILE]
+
+    def encode(self, password, salt, iterations=None):
+        return hashing_pool.run(super().encode, password, salt, iterations)
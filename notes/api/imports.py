@@ -0,0 +1,86 @@
+import csv
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import as_serializer_error
+
+from . import services
+from .models import Info
+from .serializers import InfoSerializer
+
+# Streaming import of NDJSON or CSV. Input is consumed line by line, every
+# record is validated with the same rules as the API (InfoSerializer), and
+# valid rows are written in bulk_create batches of IMPORT_BATCH_SIZE. run()
+# yields progress events so both the API endpoint and the management command
+# can report as they go.
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'application/jsonl'),
+    'csv': ('text/csv',),
+}
+
+
+def records(lines, fmt):
+    # Yields (line number, record, error) for each non-blank input record.
+    if fmt == 'csv':
+        reader = csv.DictReader(line.decode('utf-8-sig' if number == 0 else 'utf-8')
+                                for number, line in enumerate(lines))
+        for row in reader:
+            row.pop(None, None)
+            yield reader.line_num, row, None
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield number, None, {'line': [f'Invalid JSON: {error}']}
+            continue
+        if not isinstance(record, dict):
+            yield number, None, {'line': ['Expected a JSON object']}
+            continue
+        yield number, record, None
+
+
+def run(user, lines, fmt, batch_size=None):
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    counts = {'lines': 0, 'created': 0, 'failed': 0}
+    batch = []
+    # One serializer validates every record: constructing InfoSerializer per
+    # row rebuilds its fields each time and dominated import time.
+    serializer = InfoSerializer()
+
+    def flush():
+        services.bulk_create_notes(user, batch)
+        counts['created'] += len(batch)
+        batch.clear()
+        return {'event': 'progress', **counts}
+
+    try:
+        for number, record, errors in records(lines, fmt):
+            counts['lines'] = number
+            if errors is None:
+                try:
+                    instance = Info(user=user, **serializer.run_validation(record))
+                except ValidationError as exc:
+                    errors = as_serializer_error(exc)
+            if errors is not None:
+                counts['failed'] += 1
+                if counts['failed'] <= settings.IMPORT_MAX_ERRORS:
+                    yield {'event': 'error', 'line': number, 'errors': errors}
+                continue
+            batch.append(instance)
+            if len(batch) >= batch_size:
+                yield flush()
+    except (UnicodeDecodeError, csv.Error) as error:
+        if batch:
+            yield flush()
+        yield {'event': 'aborted', 'line': counts['lines'] + 1, 'errors': {'line': [str(error)]}, **counts}
+        return
+
+    if batch:
+        yield flush()
+    yield {'event': 'done', **counts}
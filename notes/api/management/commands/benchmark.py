@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.benchmarks import SCENARIOS, Bench, compare, measure
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API and HTML views against a throwaway test database seeded with users "
+        "owning the given numbers of notes. Fails when results regress against the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000],
+                            help='Notes per seeded user, e.g. --sizes 10 1000 100000')
+        parser.add_argument('--iterations', type=int, default=100,
+                            help='Timed requests per scenario; the median of these is compared')
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help='Run only these scenarios (repeatable)')
+        parser.add_argument('--baseline', default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Write the results as the new baseline instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help='Allowed latency/allocation growth over the baseline, as a fraction')
+
+    def handle(self, *args, **options):
+        names = options['scenario'] or list(SCENARIOS)
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run(names, options['sizes'], options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}, nothing to compare'))
+            return
+
+        regressions = compare(results, json.loads(baseline_path.read_text()), options['tolerance'])
+        if regressions:
+            raise CommandError('Benchmark regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run(self, names, sizes, iterations):
+        results = {}
+        self.stdout.write(f"{'scenario':<28}{'p50 ms':>10}{'p99 ms':>10}{'queries':>9}{'alloc KB':>10}")
+        for size in sizes:
+            self.stdout.write(f'-- {size} notes')
+            bench = Bench(size)
+            for name in names:
+                spec = SCENARIOS[name]
+                if spec['sizes'] and size not in spec['sizes']:
+                    continue
+                try:
+                    result = measure(spec['func'](bench), spec['iterations'] or iterations)
+                except RuntimeError as error:
+                    raise CommandError(f'{name} ({size} notes) failed: {error}')
+                results[f'{name}@{size}'] = result
+                self.stdout.write(
+                    f"{name:<28}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                    f"{result['queries']:>9}{result['alloc_kb']:>10.1f}"
+                )
+        return results
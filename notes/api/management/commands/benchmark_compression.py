@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import compression_costs, list_payload
+
+
+class Command(BaseCommand):
+    help = (
+        "Report bytes saved and CPU time per response for each installed compression codec "
+        "(gzip always, br and zstd when brotli/zstandard are installed) at COMPRESSION_LEVELS, "
+        "over info list bodies of several sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000],
+                            help='Response body sizes in KB')
+        parser.add_argument('--repeats', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'size KB':>8}  {'codec':<6}{'bytes':>10}{'saved':>8}{'cpu ms':>9}{'MB/s':>9}")
+        for size in options['sizes']:
+            payload = list_payload(size * 1024)
+            for name, cost in compression_costs(payload, options['repeats']).items():
+                saved = 1 - cost['bytes'] / len(payload)
+                speed = len(payload) / 1024 / 1024 / (cost['cpu_ms'] / 1000) if cost['cpu_ms'] else float('inf')
+                self.stdout.write(
+                    f"{len(payload) / 1024:>8.0f}  {name:<6}{cost['bytes']:>10}{saved:>8.1%}"
+                    f"{cost['cpu_ms']:>9.3f}{speed:>9.1f}"
+                )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import log_body, text_storage_costs
+
+
+class Command(BaseCommand):
+    help = (
+        "Report stored bytes and CPU time to write and read a note body for each installed "
+        "compressed text codec (zlib always, zstd when zstandard is installed), over log-like "
+        "bodies of several sizes. Request latency is covered by the info_detail_large "
+        "benchmark scenarios."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[2, 64, 1024, 8192],
+                            help='Body sizes in KB')
+        parser.add_argument('--repeats', type=int, default=10)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'size KB':>8}  {'codec':<6}{'bytes':>10}{'saved':>8}{'write ms':>10}{'read ms':>9}")
+        for size in options['sizes']:
+            text = log_body(size * 1024)
+            costs = text_storage_costs(text, options['repeats'])
+            plain = costs['plain']['bytes']
+            for name, cost in costs.items():
+                self.stdout.write(
+                    f"{plain / 1024:>8.0f}  {name:<6}{cost['bytes']:>10}{1 - cost['bytes'] / plain:>8.1%}"
+                    f"{cost['write_ms']:>10.3f}{cost['read_ms']:>9.3f}"
+                )
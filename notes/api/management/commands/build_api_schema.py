@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI document to API_SCHEMA_DIR so it is served without live generation."
+
+    def handle(self, *args, **options):
+        settings.API_SCHEMA_DIR.mkdir(parents=True, exist_ok=True)
+        for fmt in schema.CODECS:
+            path = settings.API_SCHEMA_DIR / f'swagger.{fmt}'
+            path.write_bytes(schema.build(fmt))
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
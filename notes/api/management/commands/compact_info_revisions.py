@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import InfoRevision
+
+
+class Command(BaseCommand):
+    help = "Drop revision deltas older than INFO_REVISION_RETENTION, in batches, keeping the snapshots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Revisions are deltas against newer ones only, so removing old
+        # deltas never breaks a revision that is kept: what remains of the
+        # old history is every INFO_REVISION_SNAPSHOT_EVERY-th version.
+        cutoff = timezone.now() - settings.INFO_REVISION_RETENTION
+        expired = InfoRevision.objects.filter(updated_at__lt=cutoff, snapshot__isnull=True).order_by('updated_at')
+        total = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            InfoRevision.objects.filter(pk__in=batch).delete()
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Compacted {total} revisions older than {cutoff:%Y-%m-%d %H:%M}'))
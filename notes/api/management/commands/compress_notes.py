@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from api.models import Info, InfoRevision
+
+
+class Command(BaseCommand):
+    help = ("Rewrite note bodies and revision snapshots stored before compression was enabled, in batches, "
+            "so they are stored compressed (SQLite) or lz4-compressed by TOAST (PostgreSQL).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def pending(self, model, column):
+        # Rows whose stored value is still plain text above the threshold.
+        # Rewriting them is idempotent, and updated_at is left alone, so
+        # sync clients and caches do not see a change.
+        name = f'{connection.ops.quote_name(model._meta.db_table)}.{connection.ops.quote_name(column)}'
+        if connection.vendor == 'sqlite':
+            where = [f"typeof({name}) = 'text'", f'length({name}) >= %s']
+        elif connection.vendor == 'postgresql':
+            where = [f"pg_column_compression({name}) IS DISTINCT FROM 'lz4'", f'length({name}) >= %s']
+        else:
+            return None
+        return model.objects.extra(where=where, params=[settings.COMPRESSED_TEXT_MIN_SIZE]).order_by('pk')
+
+    def handle(self, *args, **options):
+        for model, column in ((Info, 'text'), (InfoRevision, 'snapshot')):
+            pending = self.pending(model, column)
+            if pending is None:
+                self.stdout.write(f'{connection.vendor} does not compress {model._meta.db_table}.{column}, skipped')
+                continue
+            total, last = 0, 0
+            while True:
+                batch = list(pending.filter(pk__gt=last).only('pk', column)[:options['batch_size']])
+                if not batch:
+                    break
+                with transaction.atomic():
+                    model.objects.bulk_update(batch, [column])
+                total += len(batch)
+                last = batch[-1].pk
+            self.stdout.write(self.style.SUCCESS(f'Rewrote {total} values of {model._meta.db_table}.{column}'))
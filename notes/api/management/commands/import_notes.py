@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api import imports
+
+
+class Command(BaseCommand):
+    help = "Import notes for a user from an NDJSON or CSV file, validating each record and writing in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin')
+        parser.add_argument('--user', required=True, help='Username that will own the imported notes')
+        parser.add_argument('--format', choices=sorted(imports.FORMATS),
+                            help='Input format; guessed from the file extension when omitted')
+        parser.add_argument('--batch-size', type=int, help='Rows per bulk_create (default IMPORT_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']}")
+
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        if path == '-':
+            self.load(user, sys.stdin.buffer, fmt, options)
+        else:
+            if not Path(path).is_file():
+                raise CommandError(f'{path} does not exist')
+            with open(path, 'rb') as lines:
+                self.load(user, lines, fmt, options)
+
+    def load(self, user, lines, fmt, options):
+        for event in imports.run(user, lines, fmt, options['batch_size']):
+            if event['event'] == 'error':
+                self.stderr.write(f"line {event['line']}: {event['errors']}")
+            elif event['event'] == 'progress':
+                self.stdout.write(f"{event['created']} created, {event['failed']} failed, line {event['lines']}")
+            elif event['event'] == 'aborted':
+                raise CommandError(
+                    f"Stopped at line {event['line']}: {event['errors']['line'][0]} "
+                    f"({event['created']} created before that)"
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Imported {event['created']} notes, {event['failed']} failed"
+                ))
@@ -0,0 +1,73 @@
+import resource
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.benchmarks import load
+
+
+def read_rss_kb(pid):
+    for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1])
+    return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server (e.g. `uvicorn notes.asgi:application` or gunicorn) with many "
+        "concurrent keep-alive connections. Run it once against /api/info/ and once against "
+        "/api/async/info/ to compare the sync and async stacks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://127.0.0.1:8000/api/async/info/')
+        parser.add_argument('--user', required=True, help='Existing username to issue the access token for')
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=10.0)
+        parser.add_argument('--server-pid', type=int, action='append', default=[],
+                            help='Server process ids to sample peak RSS from (repeatable)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']}")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        # Each connection needs a descriptor; raise the soft limit if we can.
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = options['connections'] + 64
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+        peaks = {pid: 0 for pid in options['server_pid']}
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.1):
+                for pid in peaks:
+                    peaks[pid] = max(peaks[pid], read_rss_kb(pid))
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            result = load(options['url'], token, options['connections'], options['duration'])
+        finally:
+            done.set()
+            sampler.join()
+
+        self.stdout.write(
+            f"{options['connections']} connections, {time.perf_counter() - started:.1f}s: "
+            f"{result['requests']} requests, {result['rps']} req/s, "
+            f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms"
+        )
+        if result['errors']:
+            self.stdout.write(self.style.WARNING(f"errors: {result['errors']}"))
+        if peaks:
+            self.stdout.write(f'peak RSS: {sum(peaks.values()) / 1024:.1f} MB across {len(peaks)} process(es)')
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import InfoTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than INFO_TOMBSTONE_RETENTION, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.INFO_TOMBSTONE_RETENTION
+        expired = InfoTombstone.objects.filter(deleted_at__lt=cutoff).order_by('deleted_at')
+        total = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            InfoTombstone.objects.filter(pk__in=batch).delete()
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Purged {total} tombstones older than {cutoff:%Y-%m-%d %H:%M}'))
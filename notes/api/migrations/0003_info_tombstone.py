@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_info_ordering_and_user_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InfoTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('info_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='info_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'info_id'],
+                'indexes': [models.Index(fields=['user', 'deleted_at', 'info_id'], name='api_tombstone_user_del_idx'), models.Index(fields=['deleted_at'], name='api_tombstone_deleted_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from notes.migration_operations import CreateFullTextIndex
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('api', '0003_info_tombstone'),
+    ]
+
+    operations = [
+        CreateFullTextIndex(table='api_info'),
+    ]
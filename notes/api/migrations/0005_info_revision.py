@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_info_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InfoRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('snapshot', models.TextField(blank=True, null=True)),
+                ('delta', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('info', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='api.info')),
+            ],
+            options={
+                'ordering': ['info', '-number'],
+                'indexes': [models.Index(fields=['updated_at'], name='api_revision_updated_idx')],
+                'constraints': [models.UniqueConstraint(fields=('info', 'number'), name='api_revision_info_number_uniq')],
+            },
+        ),
+    ]
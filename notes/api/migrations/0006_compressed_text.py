@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:00
+
+import notes.fields
+from django.db import migrations
+
+from notes.migration_operations import DecompressFullTextIndex, SetColumnCompression
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_info_revision'),
+    ]
+
+    operations = [
+        # The column type stays text, so only the state changes; a real
+        # AlterField would rebuild api_info on SQLite and drop its triggers.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='info',
+                name='text',
+                field=notes.fields.CompressedTextField(),
+            ),
+            migrations.AlterField(
+                model_name='inforevision',
+                name='snapshot',
+                field=notes.fields.CompressedTextField(blank=True, null=True),
+            ),
+        ]),
+        DecompressFullTextIndex(table='api_info'),
+        SetColumnCompression(table='api_info', column='text'),
+        SetColumnCompression(table='api_inforevision', column='snapshot'),
+    ]
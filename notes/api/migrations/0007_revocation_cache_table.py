@@ -0,0 +1,30 @@
+from django.core.management.commands.createcachetable import Command as CreateCacheTable
+from django.db import migrations
+
+# The table behind the default 'revocation' cache (api.revocation.
+# RevocationCache). It is named here rather than read from CACHES, so what
+# the migration creates does not depend on the environment at migrate time;
+# it is simply unused when REDIS_URL moves the denylist to Redis.
+TABLE = 'jwt_revocation_cache'
+
+
+def create_table(apps, schema_editor):
+    command = CreateCacheTable()
+    command.verbosity = 0
+    command.create_table(schema_editor.connection.alias, TABLE, dry_run=False)
+
+
+def drop_table(apps, schema_editor):
+    if TABLE in schema_editor.connection.introspection.table_names():
+        schema_editor.execute('DROP TABLE %s' % schema_editor.quote_name(TABLE))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_compressed_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_table, drop_table),
+    ]
@@ -1,12 +1,56 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from notes.fields import CompressedTextField
+
 class Info(models.Model):
     title = models.CharField(max_length=200)
-    text = models.TextField()
+    text = CompressedTextField()
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='info_items')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-updated_at', '-id'], name='api_info_user_updated_idx'),
+        ]
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+class InfoTombstone(models.Model):
+    info_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='info_tombstones')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['deleted_at', 'info_id']
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'info_id'], name='api_tombstone_user_del_idx'),
+            models.Index(fields=['deleted_at'], name='api_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'Deleted info {self.info_id}'
+
+class InfoRevision(models.Model):
+    # A version of an Info that a later write replaced; see api.revisions.
+    info = models.ForeignKey(Info, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=200)
+    snapshot = CompressedTextField(null=True, blank=True)
+    delta = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['info', '-number']
+        constraints = [
+            models.UniqueConstraint(fields=['info', 'number'], name='api_revision_info_number_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='api_revision_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f'Revision {self.number} of info {self.info_id}'
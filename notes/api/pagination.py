@@ -0,0 +1,122 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(updated_at, pk):
+    raw = f'{updated_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        updated_at, pk = raw.split('|')
+        updated_at, pk = datetime.fromisoformat(updated_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise NotFound('Invalid cursor')
+    # encode_cursor() always writes the offset; naive times cannot be compared.
+    if updated_at.utcoffset() is None:
+        raise NotFound('Invalid cursor')
+    return updated_at, pk
+
+
+class InfoPagination(BasePagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.INFO_PAGE_SIZE
+        return max(1, min(page_size, self.max_page_size))
+
+    # Subclasses slice the queryset in get_window() and trim the fetched rows
+    # in finish_page(), so sync and async views share the same logic.
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.get_window(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish_page([row async for row in self.get_window(queryset, request)])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+# Newest-first keyset pagination on (updated_at, id). The cursor encodes the
+# last row of the previous page, so deep pages cost the same as the first one.
+class KeysetPagination(InfoPagination):
+    cursor_query_param = 'cursor'
+    ordering = ('-updated_at', '-id')
+
+    def get_window(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            updated_at, pk = decode_cursor(token)
+            # The redundant updated_at__lte bound gives the planner a range to
+            # seek to; the OR alone makes it walk the index from the top.
+            queryset = queryset.filter(
+                Q(updated_at__lt=updated_at) | Q(updated_at=updated_at, id__lt=pk),
+                updated_at__lte=updated_at,
+            )
+
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, page):
+        self.has_next = len(page) > self.page_size
+        page = page[:self.page_size]
+        self.next_cursor = encode_cursor(page[-1].updated_at, page[-1].id) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+
+# Page-number pagination for ranked search results, which have no stable
+# keyset. Result sets are bounded by the match, so OFFSET is acceptable here.
+class SearchPagination(InfoPagination):
+    page_query_param = 'page'
+    # Nobody reads that far into ranked results, and an unbounded page would
+    # overflow the database's OFFSET type.
+    max_offset = 10000
+
+    def get_window(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page_number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except ValueError:
+            raise NotFound('Invalid page')
+
+        offset = (self.page_number - 1) * self.page_size
+        if offset > self.max_offset:
+            raise NotFound('Invalid page')
+        return queryset[offset:offset + self.page_size + 1]
+
+    def finish_page(self, page):
+        self.has_next = len(page) > self.page_size
+        return page[:self.page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
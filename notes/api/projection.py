@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .serializers import InfoSerializer
+
+# Read path for InfoList and InfoDetail that skips the ModelSerializer: rows
+# come straight from values_list() and become plain dicts with the same
+# keys, order and values InfoSerializer would produce. Datetimes stay
+# datetime objects; FastJSONRenderer formats them exactly as DRF does.
+
+COLUMNS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'user': 'user__username',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+class Projected(dict):
+    # Marks a payload built here (str, int, None and aware datetimes only, no
+    # floats), which FastJSONRenderer may hand to orjson.
+    pass
+
+
+def field_names(fields=None):
+    return [name for name in InfoSerializer.Meta.fields if fields is None or name in fields]
+
+
+def project(queryset, names):
+    # id and updated_at are always fetched for the cursor and validators,
+    # even when ``fields`` leaves them out of the output.
+    columns = dict.fromkeys([*(COLUMNS[name] for name in names), 'id', 'updated_at'])
+    return queryset.values_list(*columns, named=True)
+
+
+def to_dicts(rows, names):
+    items = [{name: getattr(row, COLUMNS[name]) for name in names} for row in rows]
+    # DRF renders datetimes in the current time zone; values from the
+    # database are UTC, so only other zones need converting.
+    if timezone.get_current_timezone().utcoffset(None) != timedelta(0):
+        for item in items:
+            for name in ('created_at', 'updated_at'):
+                if name in item:
+                    item[name] = timezone.localtime(item[name])
+    return items
@@ -0,0 +1,106 @@
+import difflib
+
+from django.conf import settings
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Info, InfoRevision
+
+# Revision history for notes, kept backwards from the current text on the
+# Info row. Each write records the version it replaces as a delta against
+# the version that replaced it, so recent revisions are the cheapest to
+# rebuild and creating a note stores nothing extra. Revision numbers that are
+# a multiple of INFO_REVISION_SNAPSHOT_EVERY (and any whose delta would
+# rewrite most of the text) hold the full text instead, so rebuilding any
+# version applies fewer than INFO_REVISION_SNAPSHOT_EVERY deltas. A revision
+# only ever depends on newer ones, which lets compact_info_revisions drop old
+# deltas while the snapshots between them stay readable.
+
+_LAST_NUMBER = 2 ** 31 - 1
+
+
+def diff(new, old):
+    # Ops that rebuild ``old`` from ``new``: a positive int copies that many
+    # characters, a negative int skips them, and a string is inserted.
+    a, b = new.splitlines(keepends=True), old.splitlines(keepends=True)
+    ops = []
+
+    def emit(op):
+        if ops and type(ops[-1]) is type(op) and (isinstance(op, str) or (ops[-1] > 0) == (op > 0)):
+            ops[-1] += op
+        else:
+            ops.append(op)
+
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            emit(sum(map(len, a[i1:i2])))
+            continue
+        if i2 > i1:
+            emit(-sum(map(len, a[i1:i2])))
+        if j2 > j1:
+            emit(''.join(b[j1:j2]))
+    return ops
+
+
+def apply(delta, text):
+    parts, position = [], 0
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        elif op > 0:
+            parts.append(text[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(parts)
+
+
+def record(infos):
+    # Records the stored version of each of ``infos`` before their new
+    # title and text are saved. Call it inside the transaction that saves
+    # them: the rows are locked so concurrent writers number revisions in
+    # turn and each delta is taken against what was actually replaced.
+    if not infos:
+        return []
+    latest = InfoRevision.objects.filter(info=OuterRef('pk')).order_by('-number').values('number')[:1]
+    locked = Info.objects.select_for_update().filter(pk__in=[info.pk for info in infos]).order_by()
+    stored = {
+        row[0]: row for row in locked.annotate(last_number=Subquery(latest))
+        .values_list('pk', 'title', 'text', 'updated_at', 'last_number')
+    }
+    every = settings.INFO_REVISION_SNAPSHOT_EVERY
+    revisions = []
+    for info in infos:
+        _, title, text, updated_at, last_number = stored[info.pk]
+        if (title, text) == (info.title, info.text):
+            continue
+        revision = InfoRevision(info_id=info.pk, number=(last_number or 0) + 1, title=title, updated_at=updated_at)
+        delta = None if revision.number % every == 0 else diff(info.text, text)
+        if delta is None or 2 * sum(len(op) for op in delta if isinstance(op, str)) >= len(text):
+            revision.snapshot = text
+        else:
+            revision.delta = delta
+        revisions.append(revision)
+    return InfoRevision.objects.bulk_create(revisions)
+
+
+def revisions_for(info):
+    return InfoRevision.objects.filter(info=info)
+
+
+def get_revision(info, number):
+    # The revision with its rebuilt ``text``, in one query: it and every
+    # newer revision up to the first snapshot, or up to the current text
+    # when no snapshot follows it. None if it does not exist (any more).
+    revisions = revisions_for(info)
+    snapshot = revisions.filter(number__gte=number, snapshot__isnull=False).order_by('number').values('number')[:1]
+    chain = list(revisions.filter(
+        number__gte=number, number__lte=Coalesce(Subquery(snapshot), Value(_LAST_NUMBER)),
+    ).order_by('-number'))
+    if not chain or [revision.number for revision in chain] != list(range(chain[0].number, number - 1, -1)):
+        return None
+    text = info.text
+    for revision in chain:
+        text = revision.snapshot if revision.snapshot is not None else apply(revision.delta, text)
+    revision.text = text
+    return revision
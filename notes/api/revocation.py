@@ -0,0 +1,115 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import CachedJWTAuthentication
+
+# jti denylist for refresh-token rotation, kept in the cache instead of the
+# token_blacklist tables. A revoked jti is stored until the token would have
+# expired anyway, so the denylist never outgrows the live tokens. Rotation
+# claims the old jti with cache.add, which both revokes it and, in the same
+# round trip, tells whether it had already been used.
+#
+# Losing an entry would let a rotated token be replayed, so the denylist has
+# its own cache alias (JWT_REVOCATION_CACHE_ALIAS) that every worker shares
+# and that never evicts live entries: Redis when REDIS_URL is set, otherwise
+# RevocationCache in the database.
+
+
+class RevocationCache(DatabaseCache):
+    # DatabaseCache that, once over MAX_ENTRIES, only deletes expired rows
+    # instead of culling live ones. Entries expire with their tokens, so the
+    # table stays as large as the set of rotated, still-valid tokens.
+
+    def _cull(self, db, cursor, now, num):
+        connection = connections[db]
+        cursor.execute(
+            "DELETE FROM %s WHERE %s < %%s" % (
+                connection.ops.quote_name(self._table),
+                connection.ops.quote_name("expires"),
+            ),
+            [connection.ops.adapt_datetimefield_value(now)],
+        )
+
+
+class RevocationStore:
+
+    def get_cache(self):
+        cache = caches[settings.JWT_REVOCATION_CACHE_ALIAS]
+        if isinstance(cache, LocMemCache) and not settings.DEBUG:
+            raise ImproperlyConfigured(
+                "JWT_REVOCATION_CACHE_ALIAS must name a cache shared by all workers (Redis or the database); "
+                "a process-local cache lets other workers accept revoked tokens."
+            )
+        return cache
+
+    def key(self, jti):
+        return f'jwt:revoked:{jti}'
+
+    def revoke(self, jti, exp):
+        # Returns False when the jti was already revoked.
+        timeout = max(1, math.ceil(exp - time.time()))
+        return self.get_cache().add(self.key(jti), 1, timeout=timeout)
+
+    def is_revoked(self, jti):
+        return self.get_cache().get(self.key(jti)) is not None
+
+
+revocations = RevocationStore()
+
+
+def rotation_revokes():
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+class RevocableRefreshToken(RefreshToken):
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        # When rotating, blacklist() below is the authoritative check.
+        if not rotation_revokes() and revocations.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not revocations.revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+    def outstand(self):
+        return None
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    # TokenRefreshSerializer with the cache-backed denylist, and the user
+    # served from the authentication cache instead of a query per refresh.
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        try:
+            CachedJWTAuthentication().get_user(refresh)
+        except AuthenticationFailed:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
@@ -0,0 +1,79 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.views import get_schema_view
+from rest_framework import permissions
+
+API_INFO = openapi.Info(
+    title="Info API Documentation",
+    default_version='v1',
+    description="CRUD APP WITH JWT Authentication",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@infoapi.local"),
+    license=openapi.License(name="BSD License"),
+)
+
+schema_view = get_schema_view(
+    API_INFO,
+    public=True,
+    permission_classes=(permissions.AllowAny,),
+)
+
+# Live generation walks every view and its swagger_auto_schema decorators,
+# so outside DEBUG the document is built once per process (or read from the
+# files written by ``manage.py build_api_schema``) and served from memory.
+live_schema = schema_view.without_ui(cache_timeout=0)
+
+CODECS = {
+    'json': (OpenAPICodecJson, 'application/json'),
+    'yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def build(fmt):
+    generator = OpenAPISchemaGenerator(API_INFO)
+    codec, _ = CODECS[fmt]
+    return codec(validators=[]).encode(generator.get_schema(request=None, public=True))
+
+
+def get_document(fmt):
+    # Returns (content, etag) for the JSON or YAML document.
+    document = _documents.get(fmt)
+    if document is None:
+        with _lock:
+            document = _documents.get(fmt)
+            if document is None:
+                path = settings.API_SCHEMA_DIR / f'swagger.{fmt}'
+                content = path.read_bytes() if path.exists() else build(fmt)
+                etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+                document = _documents[fmt] = (content, etag)
+    return document
+
+
+def clear():
+    _documents.clear()
+
+
+@require_safe
+def schema_document(request, format):
+    if settings.API_SCHEMA_LIVE:
+        return live_schema(request, format=format)
+
+    fmt = format.lstrip('.')
+    content, etag = get_document(fmt)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=CODECS[fmt][1])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.API_SCHEMA_MAX_AGE)
+    return response
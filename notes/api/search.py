@@ -0,0 +1,95 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q, Value
+from django.db.models.fields import FloatField, TextField
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+from notes.fields import Decompressed
+
+# Backends mark matches with STX/ETX so highlight() can escape the note text
+# before turning the markers into <mark> tags.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+
+def highlight(snippet):
+    if snippet is None:
+        return None
+    return escape(snippet).replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+class SearchBackend:
+    # Fallback for databases without a full-text index: unranked substring
+    # matching, no snippets.
+
+    def search(self, queryset, query):
+        queryset = queryset.alias(plain_text=Decompressed('text'))
+        return queryset.filter(Q(title__icontains=query) | Q(plain_text__icontains=query)).annotate(
+            rank=Value(0.0, output_field=FloatField()),
+            snippet=Value(None, output_field=TextField()),
+        ).order_by('-rank', '-id')
+
+
+class SQLiteFTS5Backend(SearchBackend):
+
+    def match_expression(self, query):
+        # Quote every term so FTS5 operators in user input are taken
+        # literally, and prefix-match the last one for search-as-you-type.
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms) + '*'
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            select={
+                'rank': f'-bm25({table}_fts)',
+                'snippet': f"snippet({table}_fts, -1, char(2), char(3), '…', 16)",
+            },
+            tables=[f'{table}_fts'],
+            where=[f'{table}_fts.rowid = {table}.id', f'{table}_fts MATCH %s'],
+            params=[match],
+        ).order_by('-rank', '-id')
+
+
+class PostgresSearchBackend(SearchBackend):
+    # Must stay identical to the expression indexed by CreateFullTextIndex.
+    document = "to_tsvector('english'::regconfig, COALESCE({table}.title, '') || ' ' || COALESCE({table}.text, ''))"
+
+    def search(self, queryset, query):
+        table = queryset.model._meta.db_table
+        document = self.document.format(table=table)
+        tsquery = "websearch_to_tsquery('english'::regconfig, %s)"
+        return queryset.extra(
+            select={
+                'rank': f'ts_rank({document}, {tsquery})',
+                'snippet': f"ts_headline('english'::regconfig, {table}.text, {tsquery}, "
+                           f"'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxFragments=1, MaxWords=24, MinWords=8')",
+            },
+            select_params=[query, query],
+            where=[f'{document} @@ {tsquery}'],
+            params=[query],
+        ).order_by('-rank', '-id')
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(queryset):
+    if settings.SEARCH_BACKEND:
+        return import_string(settings.SEARCH_BACKEND)()
+    vendor = connections[queryset.db].vendor
+    return BACKENDS.get(vendor, SearchBackend)()
+
+
+def search(queryset, query):
+    return get_backend(queryset).search(queryset, query)
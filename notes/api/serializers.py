@@ -1,9 +1,30 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Info
+from notes import metrics
+from .models import Info, InfoRevision
+from . import services
 import re
 
-class UserSerializer(serializers.ModelSerializer):
+
+# Attributes the time spent validating and representing to the serializer
+# stage of the request metrics.
+class TimedSerializerMixin:
+
+    def is_valid(self, *args, **kwargs):
+        with metrics.timed('serializer'):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with metrics.timed('serializer'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True,min_length=8,error_messages={
         'min_length': 'Password must be at least 8 characters long.',})
     
@@ -38,13 +59,27 @@ class UserSerializer(serializers.ModelSerializer):
                                         password=validated_data['password'])
         return user
 
-class InfoSerializer(serializers.ModelSerializer):
+class InfoSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source='user.username')
     class Meta:
         model = Info
         fields = ['id', 'title', 'text', 'user', 'created_at', 'updated_at']
         read_only_fields = ['user', 'created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
     
+    def create(self, validated_data):
+        return services.create_note(**validated_data)
+
+    def update(self, instance, validated_data):
+        return services.update_note(instance, **validated_data)
+
     def validate_title(self, value):
         if len(value.strip()) == 0:
             raise serializers.ValidationError("Title cannot be empty.")
@@ -55,4 +90,18 @@ class InfoSerializer(serializers.ModelSerializer):
     def validate_text(self, value):
         if len(value.strip()) == 0:
             raise serializers.ValidationError("Text cannot be empty.")
-        return value.strip()
\ No newline at end of file
+        return value.strip()
+
+class InfoRevisionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = InfoRevision
+        fields = ['number', 'title', 'updated_at']
+        list_serializer_class = TimedListSerializer
+
+
+class InfoRevisionDetailSerializer(InfoRevisionSerializer):
+    # ``text`` is rebuilt by api.revisions.get_revision, it is not a column.
+    text = serializers.CharField(read_only=True)
+
+    class Meta(InfoRevisionSerializer.Meta):
+        fields = InfoRevisionSerializer.Meta.fields + ['text']
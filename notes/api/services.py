@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Substr
+
+from notes.fields import Decompressed
+
+from . import cache as info_cache
+from . import revisions
+from . import search
+from . import signals
+from .models import Info, InfoTombstone
+
+# The one place that reads and writes a user's notes. The REST API
+# (api.views, api.serializers) and the HTML pages (new_notes.views) both go
+# through here, so indexes, caching, search, sync tombstones and revision
+# history cover both.
+
+
+def notes_for(user):
+    return Info.objects.filter(user=user)
+
+
+def get_note(user, pk, lock=False):
+    # With ``lock``, call inside a transaction: the row stays locked until it
+    # ends, so preconditions checked against it still hold for the write.
+    notes = notes_for(user).select_related('user')
+    if lock:
+        notes = notes.select_for_update(of=('self',))
+    try:
+        return notes.get(pk=pk)
+    except Info.DoesNotExist:
+        return None
+
+
+def previews_for(user, query=''):
+    # Titles and a short preview for list pages, never the full text.
+    length = settings.NOTES_PREVIEW_LENGTH + 1
+    notes = notes_for(user).only('id', 'title').annotate(
+        preview=Substr(Decompressed('text', length), 1, length))
+    if query:
+        notes = search.search(notes, query)
+    return notes
+
+
+def create_note(user, **fields):
+    return Info.objects.create(user=user, **fields)
+
+
+def update_note(info, **fields):
+    for field, value in fields.items():
+        setattr(info, field, value)
+    # Joins the caller's transaction when there is one (see get_note).
+    with transaction.atomic(savepoint=False):
+        revisions.record([info])
+        info.save()
+    return info
+
+
+def restore_note(info, revision):
+    # Restoring is a write like any other, so the replaced text gets its own
+    # revision and the restore can be undone.
+    return update_note(info, title=revision.title, text=revision.text)
+
+
+def delete_note(info):
+    info.delete()
+
+
+def bulk_create_notes(user, notes):
+    # bulk_create bypasses the post_save signal that bumps the cache version.
+    Info.objects.bulk_create(notes)
+    info_cache.bump_version(user.pk)
+    return notes
+
+
+def bulk_update_notes(infos):
+    # Call inside the caller's transaction; bulk_update skips post_save too.
+    revisions.record(infos)
+    Info.objects.bulk_update(infos, ['title', 'text', 'updated_at'])
+
+
+def delete_notes(user, infos):
+    # Call inside the caller's transaction, which also bumps the cache
+    # version: one DELETE and one tombstone INSERT for the whole batch.
+    if not infos:
+        return
+    with signals.batch_delete():
+        notes_for(user).filter(id__in=[info.pk for info in infos]).delete()
+    InfoTombstone.objects.bulk_create(InfoTombstone(info_id=info.pk, user=user) for info in infos)
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as info_cache
+from .models import Info, InfoTombstone
+
+# Set while services.delete_notes deletes a batch: it writes the tombstones
+# with one bulk_create and the caller bumps the cache version once, instead
+# of a query and a bump per row here. Other deletes, single or queryset
+# (e.g. the admin's bulk action), still go through the receivers.
+_batch_delete = ContextVar('info_batch_delete', default=False)
+
+
+@contextmanager
+def batch_delete():
+    token = _batch_delete.set(True)
+    try:
+        yield
+    finally:
+        _batch_delete.reset(token)
+
+
+@receiver(post_save, sender=Info)
+@receiver(post_delete, sender=Info)
+def invalidate_info_cache(sender, instance, **kwargs):
+    if _batch_delete.get():
+        return
+    info_cache.bump_version(instance.user_id)
+
+
+@receiver(post_delete, sender=Info)
+def record_info_tombstone(sender, instance, origin=None, **kwargs):
+    if _batch_delete.get():
+        return
+    # Nobody is left to sync with once the owner account itself is deleted.
+    if isinstance(origin, User) or (isinstance(origin, QuerySet) and origin.model is User):
+        return
+    InfoTombstone.objects.create(info_id=instance.pk, user_id=instance.user_id)
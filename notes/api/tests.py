@@ -1,3 +1,1472 @@
-from django.test import TestCase
+import base64
+import gzip
+import io
+import json
+import zlib
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import cache as info_cache
+from . import conditional
+from . import revisions
+from . import schema
+from . import services
+from notes import compression, fields, metrics, querywatch
+from notes.database import database_config
+from .authentication import user_cache
+from .hashing import HashingBusy, HashingPool, hashing_pool
+from .models import Info, InfoRevision, InfoTombstone
+from .revocation import RevocableRefreshToken, revocations
+from .pagination import encode_cursor
+from .renderers import FastJSONRenderer
+from .serializers import InfoSerializer
+from .throttling import TokenBucketThrottle
+
+
+class InfoQueryBudgetTests(TestCase):
+    # The JWT user is served from the warm authentication cache, so budgets
+    # count only the view's own work. They are for a cold response cache;
+    # the list pays one extra query for its ETag (row count, latest update).
+    # Each budget is checked with a small and a larger collection so that a
+    # per-row query (N+1) shows up as a failure.
+    note_counts = (1, 25)
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def seed(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            Info.objects.filter(user=self.user).delete()
+            Info.objects.bulk_create(
+                Info(user=self.user, title=f'Title {i}', text=f'Text {i}') for i in range(count)
+            )
+            info_cache.bump_version(self.user.pk)
+        return Info.objects.filter(user=self.user).first()
+
+    def test_list(self):
+        for count in self.note_counts:
+            self.seed(count)
+            with self.subTest(count=count), self.assertNumQueries(2):
+                response = self.client.get(reverse('info-list'))
+            self.assertEqual(len(response.json()['results']), count)
+
+    def test_list_without_text(self):
+        for count in self.note_counts:
+            self.seed(count)
+            with self.subTest(count=count), self.assertNumQueries(2):
+                response = self.client.get(reverse('info-list'), {'fields': 'id,title,user'})
+            self.assertEqual(response.json()['results'][0]['user'], 'alice')
+
+    def test_detail(self):
+        for count in self.note_counts:
+            info = self.seed(count)
+            with self.subTest(count=count), self.assertNumQueries(1):
+                response = self.client.get(reverse('info-detail', args=[info.pk]))
+            self.assertEqual(response.json()['user'], 'alice')
+
+    def test_create(self):
+        for count in self.note_counts:
+            self.seed(count)
+            with self.subTest(count=count), self.assertNumQueries(1):
+                response = self.client.post(reverse('info-list'), {'title': 'New', 'text': 'Body'}, format='json')
+            self.assertEqual(response.status_code, 201)
+
+    def test_update(self):
+        for count in self.note_counts:
+            info = self.seed(count)
+            # Plus recording the replaced version: a locked read of the row and
+            # the revision insert, inside a savepoint here (a transaction
+            # outside tests) that also covers the If-Match check.
+            with self.subTest(count=count), self.assertNumQueries(6):
+                response = self.client.put(reverse('info-detail', args=[info.pk]), {'title': 'Changed'}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+    def test_delete(self):
+        for count in self.note_counts:
+            info = self.seed(count)
+            # Deleting also removes the note's revisions and writes the sync
+            # tombstone, inside a savepoint here (a transaction outside tests)
+            # that keeps the row locked from the If-Match check on.
+            with self.subTest(count=count), self.assertNumQueries(6):
+                response = self.client.delete(reverse('info-detail', args=[info.pk]))
+            self.assertEqual(response.status_code, 204)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_is_loaded_once(self):
+        # The sync view itself runs two queries: changed rows and tombstones.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('info-sync'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('info-sync'))
+
+    def test_deactivation_is_seen_immediately_in_process(self):
+        self.assertEqual(self.client.get(reverse('info-sync')).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('info-sync')).status_code, 401)
+
+    @override_settings(JWT_USER_CACHE_TTL=1)
+    def test_entries_expire(self):
+        self.client.get(reverse('info-sync'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('info-sync')).status_code, 200)
+        with mock.patch('api.authentication.time.monotonic', return_value=time.monotonic() + 2):
+            self.assertEqual(self.client.get(reverse('info-sync')).status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(reverse('info-sync'))
+        self.user.delete()
+        self.assertEqual(self.client.get(reverse('info-sync')).status_code, 401)
+
+
+class TokenRevocationTests(TestCase):
+
+    def setUp(self):
+        revocations.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+    def test_rotated_token_cannot_be_reused(self):
+        token = RefreshToken.for_user(self.user)
+        # Only the denylist write hits the database; the user is cached.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(token)
+        self.assertFalse([query for query in queries if 'auth_user' in query['sql']])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+    def test_denylist_entry_lives_as_long_as_the_token(self):
+        token = RefreshToken.for_user(self.user)
+        with mock.patch.object(revocations.get_cache(), 'add', wraps=revocations.get_cache().add) as add:
+            self.refresh(token)
+        timeout = add.call_args.kwargs['timeout']
+        self.assertAlmostEqual(timeout, token['exp'] - time.time(), delta=2)
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        response = self.refresh(RefreshToken.for_user(self.user))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['detail'], 'No active account found for the given token.')
+
+    def test_revocation_without_rotation(self):
+        token = RevocableRefreshToken.for_user(self.user)
+        self.assertTrue(revocations.revoke(token['jti'], token['exp']))
+        self.assertFalse(revocations.revoke(token['jti'], token['exp']))
+        with self.settings(SIMPLE_JWT={**settings.SIMPLE_JWT, 'ROTATE_REFRESH_TOKENS': False}):
+            self.assertEqual(self.refresh(token).status_code, 401)
+            self.assertEqual(self.refresh(RefreshToken.for_user(self.user)).status_code, 200)
+
+    @override_settings(
+        JWT_REVOCATION_CACHE_ALIAS='local',
+        CACHES={**settings.CACHES, 'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_process_local_denylist_is_refused_outside_debug(self):
+        with self.assertRaises(ImproperlyConfigured):
+            revocations.is_revoked('jti')
+        with self.settings(DEBUG=True):
+            self.assertFalse(revocations.is_revoked('jti'))
+
+    def test_denylist_survives_other_cache_writes(self):
+        token = RevocableRefreshToken.for_user(self.user)
+        revocations.revoke(token['jti'], token['exp'])
+        for i in range(400):
+            info_cache.get_cache().set(f'filler:{i}', i)
+        self.assertTrue(revocations.is_revoked(token['jti']))
+
+    @override_settings(CACHES={**settings.CACHES, 'revocation': {
+        **settings.CACHES['revocation'], 'OPTIONS': {'MAX_ENTRIES': 5},
+    }})
+    def test_full_denylist_only_drops_expired_entries(self):
+        cache = revocations.get_cache()
+        for i in range(5):
+            cache.set(revocations.key(f'expired-{i}'), 1, timeout=0)
+        for i in range(20):
+            revocations.revoke(f'live-{i}', time.time() + 60)
+        self.assertTrue(all(revocations.is_revoked(f'live-{i}') for i in range(20)))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM jwt_revocation_cache')
+            self.assertEqual(cursor.fetchone()[0], 20)
+
+
+class InfoCacheTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.info = Info.objects.create(user=self.user, title='Title', text='Text')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_list_is_served_from_cache(self):
+        self.assertEqual(self.client.get(reverse('info-list'))['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('info-list'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['results'][0]['title'], 'Title')
+
+    @override_settings(INFO_CACHE_SINGLE_PROCESS=False)
+    def test_process_local_cache_is_not_used_by_several_workers(self):
+        self.client.get(reverse('info-list'))
+        self.assertEqual(self.client.get(reverse('info-list'))['X-Cache'], 'MISS')
+        url = reverse('info-detail', args=[self.info.pk])
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    @override_settings(INFO_CACHE_SINGLE_PROCESS=False)
+    def test_list_etag_is_not_kept_in_a_process_local_cache(self):
+        etag = self.client.get(reverse('info-list'))['ETag']
+        # Another worker's write: its version bump never reaches this one.
+        Info.objects.bulk_create([Info(user=self.user, title='Second', text='Text')])
+        response = self.client.get(reverse('info-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_detail_is_served_from_cache(self):
+        url = reverse('info-detail', args=[self.info.pk])
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_writes_invalidate_list_and_detail(self):
+        url = reverse('info-detail', args=[self.info.pk])
+        self.client.get(reverse('info-list'))
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(url, {'title': 'Changed'}, format='json')
+        self.assertEqual(self.client.get(url).json()['title'], 'Changed')
+        self.assertEqual(self.client.get(reverse('info-list')).json()['results'][0]['title'], 'Changed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('info-list'), {'title': 'Second', 'text': 'Body'}, format='json')
+        self.assertEqual(len(self.client.get(reverse('info-list')).json()['results']), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(len(self.client.get(reverse('info-list')).json()['results']), 1)
+
+    def test_list_etag_state_is_shared_across_pages(self):
+        Info.objects.create(user=self.user, title='Second', text='Text')
+        first = self.client.get(reverse('info-list'), {'page_size': 1}).json()
+        # Only the page itself is read; the count behind the ETag is reused.
+        with self.assertNumQueries(1):
+            response = self.client.get(first['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_users_do_not_share_entries(self):
+        self.client.get(reverse('info-list'))
+        other = User.objects.create(username='bob')
+        token = RefreshToken.for_user(other).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('info-list')).json()['results'], [])
+
+
+class InfoConditionalRequestTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.info = Info.objects.create(user=self.user, title='Title', text='Text')
+        self.url = reverse('info-detail', args=[self.info.pk])
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_detail_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_after_update(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(self.url, {'title': 'Changed'}, format='json')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_list_not_modified(self):
+        response = self.client.get(reverse('info-list'))
+        self.assertTrue(response['ETag'].startswith('W/'))
+        etag = response['ETag']
+        info_cache.get_cache().clear()
+        self.assertEqual(self.client.get(reverse('info-list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(reverse('info-list'), {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_changes_after_delete(self):
+        Info.objects.create(user=self.user, title='Second', text='Text')
+        etag = self.client.get(reverse('info-list'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        self.assertEqual(self.client.get(reverse('info-list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_update_with_stale_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.url, {'title': 'Changed'}, format='json')
+        response = self.client.put(self.url, {'title': 'Lost update'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.info.refresh_from_db()
+        self.assertEqual(self.info.title, 'Changed')
+
+    def test_delete_with_current_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=etag).status_code, 204)
+
+    def test_if_match_is_checked_on_the_locked_row(self):
+        # The precondition must hold until the write commits: the row is read
+        # with a lock and checked inside the transaction that writes it.
+        evaluate, depths = conditional.evaluate, []
+
+        def checked(*args, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return evaluate(*args, **kwargs)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.url, {'title': 'Changed'}, format='json')
+        outside = len(connection.atomic_blocks)
+        async_url = reverse('async-info-detail', args=[self.info.pk])
+        with mock.patch.object(conditional, 'evaluate', checked), \
+                mock.patch.object(services, 'get_note', wraps=services.get_note) as get_note:
+            self.client.post(reverse('info-revision-restore', args=[self.info.pk, 1]))
+            async_to_sync(self.async_client.put)(async_url, {'title': 'Async'}, content_type='application/json', headers=self.headers)
+            self.client.put(self.url, {'title': 'Again'}, format='json')
+            async_to_sync(self.async_client.delete)(async_url, headers=self.headers)
+        self.assertEqual(len(depths), 4)
+        self.assertTrue(all(depth > outside for depth in depths))
+        self.assertTrue(all(call.kwargs.get('lock') for call in get_note.call_args_list))
+        self.assertFalse(Info.objects.filter(pk=self.info.pk).exists())
+
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def seed(self, count):
+        return Info.objects.bulk_create(Info(user=self.user, title=f'Title {i}', text='Text') for i in range(count))
+
+    def test_walks_rows_with_identical_updated_at(self):
+        notes = self.seed(5)
+        Info.objects.filter(user=self.user).update(updated_at=timezone.now())
+        ids, url = [], reverse('info-list') + '?page_size=2'
+        while url:
+            body = self.client.get(url).json()
+            ids += [item['id'] for item in body['results']]
+            url = body['next']
+        self.assertEqual(ids, sorted((note.pk for note in notes), reverse=True))
+
+    def test_invalid_cursor(self):
+        self.seed(1)
+        for raw in (b'\xff\xfe', b'yesterday|1', b'2026-01-01T00:00:00+00:00|', b'2026-01-01T00:00:00|1'):
+            cursor = base64.urlsafe_b64encode(raw).decode()
+            with self.subTest(raw=raw):
+                self.assertEqual(self.client.get(reverse('info-list'), {'cursor': cursor}).status_code, 404)
+        self.assertEqual(self.client.get(reverse('info-list'), {'cursor': 'garbage!'}).status_code, 404)
+
+    def test_page_size_is_clamped(self):
+        self.seed(501)
+        for page_size, expected in (('0', 1), ('-5', 1), ('1000', 500), ('junk', settings.INFO_PAGE_SIZE)):
+            with self.subTest(page_size=page_size):
+                response = self.client.get(reverse('info-list'), {'page_size': page_size})
+                self.assertEqual(len(response.json()['results']), expected)
+
+    def test_fields_leave_out_text(self):
+        self.seed(2)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('info-list'), {'fields': 'id,title'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title'})
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertIn('"title"', page_query)
+        self.assertNotIn('"text"', page_query)
+
+
+class FastReadPathTests(TestCase):
+    # The projection and FastJSONRenderer must produce exactly the bytes the
+    # serializer and JSONRenderer would.
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        user_cache.set(self.user.pk, self.user)
+        texts = ['Line\u2028separator\u2029', 'Control \x00\x1f\x7f "quoted" \\ </script>', 'Emoji 😀 and é']
+        Info.objects.bulk_create(Info(user=self.user, title=f'Title {i}', text=text) for i, text in enumerate(texts))
+        Info.objects.filter(title='Title 0').update(created_at=timezone.now().replace(microsecond=0))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def expected(self, data):
+        return JSONRenderer().render(data)
+
+    def serialized(self, **kwargs):
+        queryset = Info.objects.filter(user=self.user).order_by('-updated_at', '-id')
+        return InfoSerializer(queryset, many=True, **kwargs).data
+
+    def test_list(self):
+        response = self.client.get(reverse('info-list'))
+        self.assertEqual(response.content, self.expected({'next': None, 'results': self.serialized()}))
+        self.assertEqual(self.client.get(reverse('info-list')).content, response.content)
+
+    def test_list_fields_and_pages(self):
+        response = self.client.get(reverse('info-list'), {'fields': 'title,user', 'page_size': 2})
+        body = response.json()
+        self.assertEqual(response.content, self.expected({
+            'next': body['next'], 'results': self.serialized(fields=['title', 'user'])[:2],
+        }))
+        self.assertEqual(self.client.get(body['next']).json()['results'], self.serialized(fields=['title', 'user'])[2:])
+
+    def test_detail(self):
+        info = Info.objects.get(title='Title 0')
+        response = self.client.get(reverse('info-detail', args=[info.pk]))
+        self.assertEqual(response.content, self.expected(InfoSerializer(info).data))
+        self.assertEqual(self.client.get(reverse('info-detail', args=[info.pk])).content, response.content)
+
+    @override_settings(TIME_ZONE='Europe/Paris')
+    def test_other_time_zone(self):
+        info = Info.objects.get(title='Title 1')
+        response = self.client.get(reverse('info-detail', args=[info.pk]))
+        self.assertIn('+0', response.json()['created_at'])
+        self.assertEqual(response.content, self.expected(InfoSerializer(info).data))
+
+    def test_renderer_falls_back_for_other_payloads(self):
+        for data in [{'rank': 1e-06}, {'error': 'Info not found'}, None]:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class InfoBulkTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def bulk(self, operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('info-bulk'), {'operations': operations}, format='json')
+
+    def test_mixed_batch(self):
+        keep = Info.objects.create(user=self.user, title='Keep', text='Text')
+        drop = Info.objects.create(user=self.user, title='Drop', text='Text')
+        other = Info.objects.create(user=User.objects.create(username='bob'), title='Other', text='Text')
+        response = self.bulk([
+            {'op': 'create', 'title': ' New ', 'text': 'Body'},
+            {'op': 'create', 'title': ' ', 'text': 'Body'},
+            {'op': 'update', 'id': keep.pk, 'title': 'Kept'},
+            {'op': 'delete', 'id': drop.pk},
+            {'op': 'delete', 'id': other.pk},
+            {'op': 'move', 'id': keep.pk},
+        ])
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 200, 204, 404, 400])
+        self.assertEqual(results[0]['data']['title'], 'New')
+        self.assertIn('title', results[1]['errors'])
+        self.assertEqual(
+            sorted(Info.objects.filter(user=self.user).values_list('title', flat=True)), ['Kept', 'New']
+        )
+        self.assertTrue(Info.objects.filter(pk=other.pk).exists())
+
+    def test_update_moves_updated_at_and_invalidates_cache(self):
+        info = Info.objects.create(user=self.user, title='Title', text='Text')
+        self.client.get(reverse('info-list'))
+        self.bulk([{'op': 'update', 'id': info.pk, 'text': 'Changed'}])
+        self.assertGreater(Info.objects.get(pk=info.pk).updated_at, info.updated_at)
+        self.assertEqual(self.client.get(reverse('info-list')).json()['results'][0]['text'], 'Changed')
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        user_cache.set(self.user.pk, self.user)
+        for size in (1, 50):
+            operations = [{'op': 'create', 'title': f'Title {i}', 'text': 'Body'} for i in range(size)]
+            with self.subTest(op='create', size=size), self.assertNumQueries(3):
+                self.client.post(reverse('info-bulk'), {'operations': operations}, format='json')
+        for op in ('update', 'delete'):
+            counts = []
+            for size in (1, 50):
+                ids = [Info.objects.create(user=self.user, title='Title', text='Text').pk for _ in range(size)]
+                operations = [{'op': op, 'id': pk, 'text': 'Changed'} for pk in ids]
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.post(reverse('info-bulk'), {'operations': operations}, format='json')
+                self.assertEqual(len(response.json()['results']), size)
+                counts.append(len(queries))
+            with self.subTest(op=op):
+                self.assertEqual(counts[0], counts[1])
+
+    def test_rejects_ids_that_are_not_integers(self):
+        info = Info.objects.create(user=self.user, title='Title', text='Text')
+        response = self.bulk([
+            {'op': 'delete', 'id': [info.pk]},
+            {'op': 'update', 'id': True, 'title': 'Changed'},
+            {'op': 'delete', 'id': str(info.pk)},
+            {'op': 'update'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], [400] * 4)
+        self.assertIn('id', results[0]['errors'])
+        self.assertEqual(Info.objects.get(pk=info.pk).title, 'Title')
+
+    def test_rejects_oversized_batch(self):
+        operations = [{'op': 'delete', 'id': 1}] * (settings.INFO_BULK_MAX_OPERATIONS + 1)
+        self.assertEqual(self.bulk(operations).status_code, 400)
+
+
+@override_settings(INFO_REVISION_SNAPSHOT_EVERY=3)
+class InfoRevisionTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.info = Info.objects.create(user=self.user, title='Title 0', text=self.version(0))
+
+    def version(self, n):
+        lines = [f'line {i}\n' for i in range(20)]
+        lines[n % 20] = f'edited in version {n}\n'
+        return ''.join(lines[:10 + n])
+
+    def edit(self, count):
+        for n in range(1, count + 1):
+            services.update_note(self.info, title=f'Title {n}', text=self.version(n))
+
+    def test_delta_round_trip(self):
+        cases = [
+            ('', 'text'), ('text', ''), ('a\nb\nc\n', 'a\nB\nc\n'), ('one\ntwo', 'zero\none\ntwo\nthree'),
+            ('same\n', 'same\n'), ('x\n' * 50, 'y\n' + 'x\n' * 48 + 'z'),
+        ]
+        for new, old in cases:
+            with self.subTest(new=new, old=old):
+                self.assertEqual(revisions.apply(revisions.diff(new, old), new), old)
+
+    def test_every_version_is_rebuilt(self):
+        self.edit(10)
+        stored = list(InfoRevision.objects.filter(info=self.info).order_by('number'))
+        self.assertEqual([revision.number for revision in stored], list(range(1, 11)))
+        self.assertEqual(
+            [revision.number for revision in stored if revision.snapshot is not None], [3, 6, 9])
+        for revision in stored:
+            with self.subTest(number=revision.number):
+                # The Info row, then the revision and the deltas above it.
+                with self.assertNumQueries(2):
+                    response = self.client.get(reverse('info-revision-detail', args=[self.info.pk, revision.number]))
+                self.assertEqual(response.json()['text'], self.version(revision.number - 1))
+                self.assertEqual(response.json()['title'], f'Title {revision.number - 1}')
+
+    def test_unchanged_write_records_nothing(self):
+        services.update_note(self.info, title='Title 0', text=self.version(0))
+        self.assertFalse(InfoRevision.objects.exists())
+
+    @override_settings(INFO_REVISION_PAGE_SIZE=4)
+    def test_list_is_paged_newest_first(self):
+        self.edit(6)
+        url = reverse('info-revisions', args=[self.info.pk])
+        first = self.client.get(url).json()
+        self.assertEqual([revision['number'] for revision in first['results']], [6, 5, 4, 3])
+        second = self.client.get(url, {'before': first['next']}).json()
+        self.assertEqual([revision['number'] for revision in second['results']], [2, 1])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(url, {'before': 'x'}).status_code, 400)
+
+    def test_restore(self):
+        self.edit(4)
+        url = reverse('info-revision-restore', args=[self.info.pk, 2])
+        self.assertEqual(self.client.post(url, headers={'If-Match': '"stale"'}).status_code, 412)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['text'], self.version(1))
+        self.assertEqual(Info.objects.get(pk=self.info.pk).text, self.version(1))
+        # The restore replaced version 4, which can be restored in turn.
+        response = self.client.get(reverse('info-revision-detail', args=[self.info.pk, 5]))
+        self.assertEqual(response.json()['text'], self.version(4))
+        self.assertEqual(self.client.get(reverse('info-detail', args=[self.info.pk])).json()['text'], self.version(1))
+
+    def test_missing_and_foreign_revisions_are_not_found(self):
+        self.edit(1)
+        other = Info.objects.create(user=User.objects.create(username='bob'), title='Private', text='Text')
+        services.update_note(other, text='Changed')
+        for method, url in (
+            ('get', reverse('info-revision-detail', args=[self.info.pk, 2])),
+            ('get', reverse('info-revision-detail', args=[other.pk, 1])),
+            ('get', reverse('info-revisions', args=[other.pk])),
+            ('post', reverse('info-revision-restore', args=[other.pk, 1])),
+            ('post', reverse('info-revision-restore', args=[self.info.pk, 2])),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(getattr(self.client, method)(url).status_code, 404)
+
+    def test_bulk_async_and_html_updates_are_recorded(self):
+        self.client.post(reverse('info-bulk'), {'operations': [
+            {'op': 'update', 'id': self.info.pk, 'text': 'From bulk'},
+        ]}, format='json')
+        token = RefreshToken.for_user(self.user).access_token
+        async_to_sync(self.async_client.put)(
+            reverse('async-info-detail', args=[self.info.pk]), {'text': 'From async'},
+            content_type='application/json', headers={'Authorization': f'Bearer {token}'})
+        self.client.force_login(self.user)
+        self.client.post(reverse('notes.update', args=[self.info.pk]), {'title': 'Title 0', 'text': 'From form'})
+        texts = [
+            self.client.get(reverse('info-revision-detail', args=[self.info.pk, n])).json()['text'] for n in (1, 2, 3)
+        ]
+        self.assertEqual(texts, [self.version(0), 'From bulk', 'From async'])
+
+    def test_compaction_keeps_snapshots_and_recent_revisions(self):
+        self.edit(8)
+        old = timezone.now() - settings.INFO_REVISION_RETENTION - timedelta(days=1)
+        InfoRevision.objects.filter(number__lte=5).update(updated_at=old)
+        out = io.StringIO()
+        call_command('compact_info_revisions', batch_size=2, stdout=out)
+        self.assertIn('Compacted 4 revisions', out.getvalue())
+        self.assertEqual(list(InfoRevision.objects.order_by('number').values_list('number', flat=True)), [3, 6, 7, 8])
+        for number in (3, 6, 7, 8):
+            response = self.client.get(reverse('info-revision-detail', args=[self.info.pk, number]))
+            self.assertEqual(response.json()['text'], self.version(number - 1))
+        self.assertEqual(self.client.get(reverse('info-revision-detail', args=[self.info.pk, 4])).status_code, 404)
+
+
+@override_settings(INFO_SYNC_SETTLE_SECONDS=0)
+class InfoSyncTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get(reverse('info-sync'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initial_then_incremental(self):
+        first = Info.objects.create(user=self.user, title='First', text='Text')
+        second = Info.objects.create(user=self.user, title='Second', text='Text')
+        Info.objects.create(user=User.objects.create(username='bob'), title='Other', text='Text')
+
+        initial = self.sync()
+        self.assertEqual([item['id'] for item in initial['changes']], [first.pk, second.pk])
+        self.assertFalse(initial['has_more'])
+        unchanged = self.sync(initial['cursor'])
+        self.assertEqual((unchanged['changes'], unchanged['deleted']), ([], []))
+
+        first.title = 'First, edited'
+        first.save()
+        second_id = second.pk
+        second.delete()
+        third = Info.objects.create(user=self.user, title='Third', text='Text')
+        delta = self.sync(initial['cursor'])
+        self.assertEqual([item['id'] for item in delta['changes']], [first.pk, third.pk])
+        self.assertEqual(delta['changes'][0]['title'], 'First, edited')
+        self.assertEqual(delta['deleted'], [second_id])
+
+    def test_pages_through_changes_and_deletions(self):
+        notes = [Info.objects.create(user=self.user, title=f'Title {i}', text='Text') for i in range(5)]
+        ids = [note.pk for note in notes]
+        cursor = self.sync()['cursor']
+        notes[0].delete()
+        notes[1].save()
+        notes[2].delete()
+
+        changes, deleted = [], []
+        page = {'has_more': True, 'cursor': cursor}
+        while page['has_more']:
+            page = self.sync(page['cursor'], page_size=1)
+            changes += [item['id'] for item in page['changes']]
+            deleted += page['deleted']
+        self.assertEqual(changes, [ids[1]])
+        self.assertEqual(deleted, [ids[0], ids[2]])
+
+    def test_cursor_without_utc_offset(self):
+        naive = base64.urlsafe_b64encode(b'2026-01-01T00:00:00|1').decode()
+        self.assertEqual(self.client.get(reverse('info-sync'), {'since': naive}).status_code, 404)
+
+    def test_expired_cursor(self):
+        old = encode_cursor(timezone.now() - settings.INFO_TOMBSTONE_RETENTION - timedelta(days=1), 0)
+        self.assertEqual(self.client.get(reverse('info-sync'), {'since': old}).status_code, 410)
+
+    def test_bulk_delete_writes_tombstones_in_one_query(self):
+        user_cache.set(self.user.pk, self.user)
+        cursor = self.sync()['cursor']
+        counts, deleted = [], []
+        for size in (1, 50):
+            ids = [Info.objects.create(user=self.user, title='Title', text='Text').pk for _ in range(size)]
+            deleted += ids
+            with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('info-bulk'), {'operations': [{'op': 'delete', 'id': pk} for pk in ids]}, format='json')
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(sorted(InfoTombstone.objects.values_list('info_id', flat=True)), sorted(deleted))
+        self.assertEqual(self.sync(cursor, page_size=100)['deleted'], deleted)
+
+    def test_deleting_the_account_leaves_no_tombstones(self):
+        Info.objects.create(user=self.user, title='Title', text='Text')
+        self.user.delete()
+        self.assertFalse(InfoTombstone.objects.exists())
+
+
+class InfoSearchTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def search(self, query, **params):
+        info_cache.get_cache().clear()
+        response = self.client.get(reverse('info-list'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_ranked_results_with_snippets(self):
+        Info.objects.create(user=self.user, title='Groceries', text='Buy milk and bread')
+        best = Info.objects.create(user=self.user, title='Milk', text='Milk prices: milk is <cheap>')
+        Info.objects.create(user=self.user, title='Unrelated', text='Nothing to see')
+        Info.objects.create(user=User.objects.create(username='bob'), title='Milk', text='Not yours')
+
+        results = self.search('milk')['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['id'], best.pk)
+        self.assertGreaterEqual(results[0]['rank'], results[1]['rank'])
+        self.assertIn('<mark>', results[0]['snippet'])
+        self.assertNotIn('<cheap>', results[0]['snippet'])
+
+    def test_index_follows_updates_deletes_and_bulk_writes(self):
+        info = Info.objects.create(user=self.user, title='Title', text='apples')
+        info.text = 'oranges'
+        info.save()
+        self.assertEqual(self.search('apples')['results'], [])
+        self.assertEqual(len(self.search('oranges')['results']), 1)
+
+        Info.objects.bulk_create([Info(user=self.user, title='Bulk', text='pears')])
+        self.assertEqual(len(self.search('pears')['results']), 1)
+
+        info.delete()
+        self.assertEqual(self.search('oranges')['results'], [])
+
+    def test_prefix_and_operator_characters(self):
+        Info.objects.create(user=self.user, title='Meeting notes', text='Discussed the roadmap')
+        self.assertEqual(len(self.search('roadm')['results']), 1)
+        self.assertEqual(len(self.search('"road" AND -( map')['results']), 0)
+        self.assertEqual(self.search('!!!')['results'], [])
+
+    def test_paginates_results(self):
+        Info.objects.bulk_create(Info(user=self.user, title=f'Note {i}', text='kiwi') for i in range(3))
+        first = self.search('kiwi', page_size=2)
+        self.assertEqual(len(first['results']), 2)
+        info_cache.get_cache().clear()
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 1)
+        self.assertIsNone(second['next'])
+        ids = {item['id'] for item in first['results'] + second['results']}
+        self.assertEqual(len(ids), 3)
+
+    def test_rejects_pages_past_the_offset_limit(self):
+        Info.objects.create(user=self.user, title='Note', text='kiwi')
+        self.assertEqual(self.search('kiwi', page=201, page_size=50)['results'], [])
+        for page in (202, 10 ** 30):
+            with self.subTest(page=page):
+                response = self.client.get(reverse('info-list'), {'q': 'kiwi', 'page': page, 'page_size': 50})
+                self.assertEqual(response.status_code, 404)
+
+
+class InfoIndexUsageTests(TestCase):
+    # Runs on SQLite and, when DATABASE_URL points at one, on PostgreSQL.
+    # Sequential scans are disabled on PostgreSQL so the planner reports the
+    # index it would pick on a large table instead of scanning a tiny one.
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.info = Info.objects.create(user=self.user, title='Title', text='Text')
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_list_first_page(self):
+        queryset = Info.objects.filter(user=self.user).order_by('-updated_at', '-id')[:51]
+        self.assertUsesIndex(queryset, 'api_info_user_updated_idx')
+
+    def test_list_next_page(self):
+        now = timezone.now()
+        queryset = Info.objects.filter(user=self.user).filter(
+            Q(updated_at__lt=now) | Q(updated_at=now, id__lt=self.info.pk), updated_at__lte=now,
+        ).order_by('-updated_at', '-id')[:51]
+        self.assertUsesIndex(queryset, 'api_info_user_updated_idx')
+
+    def test_detail(self):
+        plan = self.explain(Info.objects.filter(pk=self.info.pk, user=self.user))
+        if connection.vendor == 'postgresql':
+            self.assertIn('api_info_pkey', plan)
+        else:
+            self.assertIn('INTEGER PRIMARY KEY', plan)
+
+
+@override_settings(API_SCHEMA_LIVE=False)
+class SchemaDocumentTests(TestCase):
+
+    def setUp(self):
+        schema.clear()
+        self.addCleanup(schema.clear)
+
+    def test_built_once_and_revalidated_with_etag(self):
+        url = reverse('schema-json', kwargs={'format': '.json'})
+        with mock.patch.object(schema, 'build', wraps=schema.build) as build:
+            first = self.client.get(url)
+            second = self.client.get(url)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertIn('/info/', first.json()['paths'])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_serves_file_written_by_command(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(API_SCHEMA_DIR=Path(directory)):
+            call_command('build_api_schema', stdout=io.StringIO())
+            (Path(directory) / 'swagger.yaml').write_text('swagger: "2.0"\n')
+            response = self.client.get(reverse('schema-json', kwargs={'format': '.yaml'}))
+        self.assertEqual(response.content, b'swagger: "2.0"\n')
+        self.assertEqual(response['Content-Type'], 'application/yaml')
+
+    def test_ui_points_at_document(self):
+        response = self.client.get(reverse('schema-swagger-ui'))
+        self.assertContains(response, reverse('schema-json', kwargs={'format': '.json'}))
+
+
+class AsyncInfoViewTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.info = Info.objects.create(user=self.user, title='Title', text='Text')
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_matches_sync_views(self):
+        for sync_url, async_url in [
+            (reverse('info-list'), reverse('async-info-list')),
+            (reverse('info-detail', args=[self.info.pk]), reverse('async-info-detail', args=[self.info.pk])),
+        ]:
+            info_cache.get_cache().clear()
+            expected = self.client.get(sync_url)
+            info_cache.get_cache().clear()
+            response = async_to_sync(self.async_client.get)(async_url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response['ETag'], expected['ETag'])
+
+    async def test_crud(self):
+        response = await self.async_client.post(
+            reverse('async-info-list'), {'title': ' New ', 'text': 'Body'},
+            content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        pk = response.json()['data']['id']
+        self.assertEqual(response.json()['data']['title'], 'New')
+
+        url = reverse('async-info-detail', args=[pk])
+        response = await self.async_client.put(url, {'title': 'Changed'}, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.json()['data']['title'], 'Changed')
+        response = await self.async_client.put(url, {'title': ''}, content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.delete(url, headers={**self.headers, 'If-Match': '"stale"'})
+        self.assertEqual(response.status_code, 412)
+        response = await self.async_client.delete(url, headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(await Info.objects.filter(pk=pk).aexists())
+
+    def test_writes_go_through_services(self):
+        with mock.patch.object(services, 'create_note', wraps=services.create_note) as create_note, \
+                mock.patch.object(services, 'delete_note', wraps=services.delete_note) as delete_note:
+            response = async_to_sync(self.async_client.post)(
+                reverse('async-info-list'), {'title': 'New', 'text': 'Body'},
+                content_type='application/json', headers=self.headers)
+            url = reverse('async-info-detail', args=[response.json()['data']['id']])
+            async_to_sync(self.async_client.delete)(url, headers=self.headers)
+        create_note.assert_called_once_with(self.user, title='New', text='Body')
+        delete_note.assert_called_once()
+
+    async def test_other_users_rows_are_not_found(self):
+        other = await User.objects.acreate(username='bob')
+        info = await Info.objects.acreate(user=other, title='Private', text='Text')
+        response = await self.async_client.get(reverse('async-info-detail', args=[info.pk]), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('async-info-list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = await self.async_client.get(reverse('async-info-list'), headers={'Authorization': 'Bearer junk'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+
+@override_settings(PASSWORD_HASH_PROFILE='fast')
+class AuthThrottleTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        User.objects.create_user(username='alice', password='Secret@Pass1')
+        self.client = APIClient()
+
+    def login(self, password, address='10.0.0.1'):
+        return self.client.post(reverse('api-login'), {'username': 'Alice', 'password': password},
+                                format='json', REMOTE_ADDR=address)
+
+    def test_username_bucket_spans_addresses(self):
+        for i in range(10):
+            self.assertEqual(self.login('wrong', f'10.0.0.{i}').status_code, 401)
+        response = self.login('Secret@Pass1', '10.0.1.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_bucket_refills(self):
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1000.0):
+            for i in range(10):
+                self.login('wrong', f'10.0.0.{i}')
+            self.assertEqual(self.login('wrong').status_code, 429)
+        # '10/min' refills one token every six seconds.
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1006.0):
+            self.assertEqual(self.login('wrong').status_code, 401)
+            self.assertEqual(self.login('wrong').status_code, 429)
+
+    def test_register_is_limited_per_address(self):
+        for i in range(10):
+            self.client.post(reverse('api-register'), {}, format='json')
+        self.assertEqual(self.client.post(reverse('api-register'), {}, format='json').status_code, 429)
+
+    def test_saturated_hashing_returns_503(self):
+        with mock.patch.object(hashing_pool, 'run', side_effect=HashingBusy(wait=1)):
+            response = self.client.post(reverse('api-login'), {'username': 'alice', 'password': 'Secret@Pass1'}, format='json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+@override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_PROFILE='fast')
+class HashingPoolTests(TestCase):
+
+    def test_fails_fast_when_full(self):
+        pool = HashingPool()
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        with self.assertRaises(HashingBusy):
+            pool.run(lambda: None)
+        release.set()
+        worker.join()
+        self.assertEqual(pool.run(lambda: 'done'), 'done')
+
+    def test_html_sign_in_answers_503_when_full(self):
+        User.objects.create_user(username='bob', password='Secret@Pass1')
+        with mock.patch.object(hashing_pool, 'run', side_effect=HashingBusy(wait=1)):
+            for url in (reverse('login'), '/admin/login/'):
+                with self.subTest(url=url):
+                    response = self.client.post(url, {'username': 'bob', 'password': 'Secret@Pass1'})
+                    self.assertEqual(response.status_code, 503)
+                    self.assertEqual(response['Retry-After'], '1')
+
+    def test_profile_sets_iterations(self):
+        user = User.objects.create_user(username='bob', password='Secret@Pass1')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        with override_settings(PASSWORD_HASH_PROFILE='standard'):
+            self.assertTrue(user.check_password('Secret@Pass1'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$600000$'))
+
+
+
+@override_settings(METRICS_SAMPLE_RATE=1, METRICS_SERVER_TIMING=True, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.registry.clear()
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        Info.objects.create(user=self.user, title='Title', text='Text')
+        user_cache.set(self.user.pk, self.user)
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def scrape(self):
+        response = APIClient().get(reverse('metrics'), headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_sampled_request_is_broken_down(self):
+        response = self.client.get(reverse('info-list'))
+        self.client.get(reverse('info-list'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", serializer;dur=[\d.]+, render;dur=[\d.]+, total;dur=[\d.]+$')
+
+        text = self.scrape()
+        self.assertIn('notes_requests_total{view="info-list",method="GET",status="200"} 2', text)
+        self.assertIn('notes_request_duration_seconds_count{view="info-list"} 2', text)
+        self.assertIn('notes_db_queries_total{view="info-list"} 2', text)
+        self.assertIn('notes_cache_results_total{view="info-list",result="HIT"} 1', text)
+        self.assertIn('notes_cache_results_total{view="info-list",result="MISS"} 1', text)
+        self.assertIn(f'notes_response_bytes_total{{view="info-list"}} {2 * len(response.content)}', text)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_only_counted(self):
+        response = self.client.get(reverse('info-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        text = self.scrape()
+        self.assertIn('notes_requests_total{view="info-list",method="GET",status="200"} 1', text)
+        self.assertIn('notes_sampled_requests_total{view="info-list"} 0', text)
+
+    def test_template_render_time(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('notes.list'))
+        stats = metrics.registry.views['notes.list']
+        self.assertEqual(stats.sampled, 1)
+        self.assertGreater(stats.render, 0)
+        self.assertGreaterEqual(stats.render, stats.serializer)
+
+    def test_async_view_queries_are_counted(self):
+        info_cache.get_cache().clear()
+        response = async_to_sync(self.async_client.get)(reverse('async-info-list'), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+        self.assertEqual(metrics.registry.views['async-info-list'].queries, 2)
+
+    def test_token(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(client.get(reverse('metrics'), headers={'Authorization': 'Bearer wrong'}).status_code, 403)
+        response = client.get(reverse('metrics'), headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_no_token_is_only_public_in_debug(self):
+        client = APIClient()
+        self.assertEqual(client.get(reverse('metrics')).status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(client.get(reverse('metrics')).status_code, 200)
+
+
+
+@override_settings(QUERY_WATCH='raise', QUERY_WATCH_REPEAT=3, QUERY_WATCH_SLOW_MS=100, QUERY_WATCH_ALLOW={})
+class QueryWatchTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        Info.objects.bulk_create(Info(user=self.user, title=f'Title {i}', text='Text') for i in range(3))
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def without_select_related(self):
+        return mock.patch.object(QuerySet, 'select_related', lambda queryset, *fields: queryset)
+
+    def test_n_plus_one_fails_the_request(self):
+        with self.without_select_related(), self.assertRaises(querywatch.QueryProblem) as raised:
+            self.client.get(reverse('info-list'), {'q': 'Title'})
+        problem = json.loads(str(raised.exception))
+        self.assertEqual(problem['kind'], 'repeat')
+        self.assertEqual(problem['view'], 'info-list')
+        self.assertEqual(problem['count'], 3)
+        self.assertIn('"auth_user"', problem['sql'])
+        self.assertTrue(any('api/views.py' in frame for frame in problem['stack']))
+
+    def test_allowlist(self):
+        with self.settings(QUERY_WATCH_ALLOW={'info-list': ['repeat']}), self.without_select_related():
+            self.assertEqual(self.client.get(reverse('info-list'), {'q': 'Title'}).status_code, 200)
+
+    def test_warn_logs_slow_queries(self):
+        with self.settings(QUERY_WATCH='warn', QUERY_WATCH_SLOW_MS=0), \
+                self.assertLogs('notes.querywatch', 'WARNING') as logs:
+            self.assertEqual(self.client.get(reverse('info-list')).status_code, 200)
+        problems = [json.loads(message.split(':', 2)[2]) for message in logs.output]
+        self.assertEqual({problem['kind'] for problem in problems}, {'slow'})
+
+    def test_batches_of_different_sizes_share_a_shape(self):
+        self.assertEqual(
+            querywatch.shape('SELECT * FROM "api_info" WHERE "api_info"."id" IN (%s, %s, %s)'),
+            querywatch.shape('SELECT * FROM "api_info" WHERE "api_info"."id" IN (%s)'),
+        )
+        self.assertEqual(
+            querywatch.shape('INSERT INTO "api_info" ("title") VALUES (%s), (%s)'),
+            querywatch.shape('INSERT INTO "api_info" ("title") VALUES (%s)'),
+        )
+
+    def test_watch_block(self):
+        with self.assertRaises(querywatch.QueryProblem):
+            with querywatch.watch('loop'):
+                for info in Info.objects.all():
+                    info.user.username
+
+
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, COMPRESSION_ENCODINGS=['zstd', 'br', 'gzip'])
+class CompressionTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        Info.objects.bulk_create(Info(user=self.user, title=f'Title {i}', text='Body text ' * 20) for i in range(20))
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def with_codecs(self, *names):
+        codecs = {name: mock.Mock(available=mock.Mock(return_value=name in names)) for name in ('zstd', 'br')}
+        for name, codec in codecs.items():
+            codec.name = name
+        return mock.patch.dict(compression.CODECS, codecs)
+
+    def test_negotiation(self):
+        with self.with_codecs('zstd', 'br'):
+            self.assertEqual(compression.negotiate('gzip, br').name, 'br')
+            self.assertEqual(compression.negotiate('gzip, br, zstd').name, 'zstd')
+            self.assertEqual(compression.negotiate('gzip, br;q=0.5').name, 'gzip')
+            self.assertEqual(compression.negotiate('*;q=0.1').name, 'zstd')
+            self.assertEqual(compression.negotiate('br, gzip', html=True).name, 'gzip')
+            self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        with self.with_codecs():
+            self.assertEqual(compression.negotiate('br, zstd, gzip;q=0.1').name, 'gzip')
+            self.assertIsNone(compression.negotiate('br'))
+
+    def test_gzip_list(self):
+        plain = self.client.get(reverse('info-list'))
+        info_cache.get_cache().clear()
+        response = self.client.get(reverse('info-list'), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) // 4)
+
+    def test_small_responses_are_left_alone(self):
+        info = Info.objects.filter(user=self.user).first()
+        with self.settings(COMPRESSION_MIN_SIZE=1024):
+            response = self.client.get(reverse('info-detail', args=[info.pk]), headers={'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_weakened_etag_still_matches_if_match(self):
+        info = Info.objects.filter(user=self.user).first()
+        with self.settings(COMPRESSION_MIN_SIZE=1):
+            response = self.client.get(reverse('info-detail', args=[info.pk]), headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.put(
+            reverse('info-detail', args=[info.pk]), {'title': 'Changed'}, format='json',
+            headers={'If-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_streaming_is_compressed_incrementally(self):
+        with self.settings(EXPORT_BUFFER_SIZE=64):
+            response = self.client.get(reverse('info-export'), {'output': 'ndjson'}, headers={'Accept-Encoding': 'gzip'})
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            decompressor = zlib.decompressobj(31)
+            chunks = iter(response.streaming_content)
+            first = decompressor.decompress(next(chunks))
+            while not first:
+                first = decompressor.decompress(next(chunks))
+            self.assertEqual(json.loads(first.split(b'\n')[0])['title'], 'Title 0')
+            rest = b''.join(decompressor.decompress(chunk) for chunk in chunks)
+        self.assertEqual(len((first + rest).splitlines()), 20)
+
+    def test_html_gets_padded_gzip(self):
+        self.client.force_login(self.user)
+        with self.with_codecs('zstd', 'br'):
+            first = self.client.get(reverse('notes.list'), headers={'Accept-Encoding': 'br, zstd, gzip'})
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertIn(b'Title 0', gzip.decompress(first.content))
+
+    def test_export_gzip_parameter_is_not_compressed_twice(self):
+        response = self.client.get(reverse('info-export'), {'gzip': '1'}, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(b''.join(response.streaming_content)))), 20)
+
+
+class CompressedTextTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.log = ''.join(f'12:00:{i % 60:02d} INFO request {i} served in {i % 7} ms\n' for i in range(500))
+
+    def stored(self, model, pk, column='text'):
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT typeof({column}), length({column}) FROM {table} WHERE id = %s', [pk])
+            return cursor.fetchone()
+
+    def test_large_bodies_are_stored_compressed(self):
+        info = Info.objects.create(user=self.user, title='Log', text=self.log)
+        kind, size = self.stored(Info, info.pk)
+        self.assertEqual(kind, 'blob')
+        self.assertLess(size, len(self.log) / 5)
+        self.assertEqual(Info.objects.get(pk=info.pk).text, self.log)
+        self.assertEqual(Info.objects.values_list('text', flat=True).get(pk=info.pk), self.log)
+        self.assertEqual(self.client.get(reverse('info-detail', args=[info.pk])).json()['text'], self.log)
+
+    def test_small_bodies_stay_text(self):
+        info = Info.objects.create(user=self.user, title='Plain', text='short note')
+        self.assertEqual(self.stored(Info, info.pk)[0], 'text')
+        self.assertEqual(Info.objects.get(pk=info.pk).text, 'short note')
+        # Values that would not shrink are kept as they are.
+        self.assertEqual(fields.compress('abc'), 'abc')
+
+    def test_partial_decompression(self):
+        stored = fields.compress(self.log)
+        self.assertEqual(fields.decompress(stored, 100), self.log[:100])
+        self.assertEqual(fields.decompress('plain text', 5), 'plain')
+        self.assertIsNone(fields.decompress(None))
+
+    def test_search_and_previews_see_the_plain_text(self):
+        info = Info.objects.create(user=self.user, title='Log', text=self.log + 'kaboom happened\n')
+        response = self.client.get(reverse('info-list'), {'q': 'kaboom'})
+        self.assertEqual([result['id'] for result in response.json()['results']], [info.pk])
+        self.assertIn('<mark>kaboom</mark>', response.json()['results'][0]['snippet'])
+        self.assertEqual(services.previews_for(self.user).get().preview, self.log[:settings.NOTES_PREVIEW_LENGTH + 1])
+
+        services.update_note(info, text=self.log + 'all quiet\n')
+        info_cache.get_cache().clear()
+        self.assertEqual(self.client.get(reverse('info-list'), {'q': 'kaboom'}).json()['results'], [])
+        self.assertEqual(len(self.client.get(reverse('info-list'), {'q': 'quiet'}).json()['results']), 1)
+
+    def test_revision_snapshots_are_compressed(self):
+        info = Info.objects.create(user=self.user, title='Log', text=self.log)
+        services.update_note(info, text='Replaced')
+        revision = InfoRevision.objects.get(info=info)
+        self.assertEqual(self.stored(InfoRevision, revision.pk, 'snapshot')[0], 'blob')
+        response = self.client.get(reverse('info-revision-detail', args=[info.pk, 1]))
+        self.assertEqual(response.json()['text'], self.log)
+
+    def test_command_compresses_existing_rows(self):
+        with override_settings(COMPRESSED_TEXT_MIN_SIZE=10 ** 9):
+            info = Info.objects.create(user=self.user, title='Log', text=self.log)
+            small = Info.objects.create(user=self.user, title='Small', text='short note')
+        self.assertEqual(self.stored(Info, info.pk)[0], 'text')
+        out = io.StringIO()
+        call_command('compress_notes', batch_size=1, stdout=out)
+        self.assertIn('Rewrote 1 values of api_info.text', out.getvalue())
+        self.assertEqual(self.stored(Info, info.pk)[0], 'blob')
+        self.assertEqual(self.stored(Info, small.pk)[0], 'text')
+        self.assertEqual(Info.objects.get(pk=info.pk).updated_at, info.updated_at)
+        self.assertEqual(Info.objects.get(pk=info.pk).text, self.log)
+
+        call_command('compress_notes', stdout=out)
+        self.assertIn('Rewrote 0 values of api_info.text', out.getvalue())
+
+    @override_settings(COMPRESSED_TEXT_CODEC='zstd')
+    def test_missing_codec_is_reported(self):
+        with mock.patch.object(fields, 'zstandard', None), self.assertRaises(ImproperlyConfigured):
+            Info.objects.create(user=self.user, title='Log', text=self.log)
+
+
+class DatabaseConfigTests(TestCase):
+    url = 'postgres://notes:secret@db:5432/notes'
+
+    def test_persistent_connections_by_default(self):
+        config = database_config(self.url, env={})
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', config.get('OPTIONS', {}))
+
+    def test_environment_overrides(self):
+        config = database_config(self.url, env={'DB_CONN_MAX_AGE': '0', 'DB_CONN_HEALTH_CHECKS': 'False'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_pool(self):
+        pool = mock.Mock()
+        with mock.patch.dict(sys.modules, {'psycopg_pool': pool}):
+            config = database_config(self.url, env={'DB_POOL': 'True', 'DB_POOL_MAX_SIZE': '20'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['pool'], {
+            'min_size': 2, 'max_size': 20, 'timeout': 10.0, 'check': pool.ConnectionPool.check_connection,
+        })
+
+    def test_pool_requirements(self):
+        with mock.patch.dict(sys.modules, {'psycopg_pool': None}), self.assertRaises(ImproperlyConfigured):
+            database_config(self.url, env={'DB_POOL': 'True'})
+        with self.assertRaises(ImproperlyConfigured):
+            database_config('sqlite:///db.sqlite3', env={'DB_POOL': 'True'})
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2, EXPORT_BUFFER_SIZE=64)
+class InfoExportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        other = User.objects.create(username='bob')
+        Info.objects.bulk_create(Info(user=self.user, title=f'Note {i}', text='Line break') for i in range(5))
+        Info.objects.create(user=other, title='Private', text='Text')
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def export(self, **params):
+        response = self.client.get(reverse('info-export'), params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_json_array_matches_api_representation(self):
+        with self.assertNumQueries(1):
+            response, body = self.export()
+        items = json.loads(body)
+        self.assertEqual([item['title'] for item in items], [f'Note {i}' for i in range(5)])
+        self.assertEqual(items[0]['user'], 'alice')
+        self.assertEqual(items, InfoSerializer(Info.objects.filter(user=self.user).order_by('id'), many=True).data)
+        self.assertIn('info-export.json', response['Content-Disposition'])
+
+    def test_ndjson_gzip(self):
+        response, body = self.export(output='ndjson', gzip='1')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = gzip.decompress(body).decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[4])['title'], 'Note 4')
+
+    def test_rejects_unknown_options(self):
+        self.assertEqual(self.client.get(reverse('info-export'), {'output': 'xml'}).status_code, 400)
+
+
+@override_settings(IMPORT_BATCH_SIZE=2)
+class InfoImportTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        user_cache.set(self.user.pk, self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def upload(self, body, content_type):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.generic('POST', reverse('info-import'), body, content_type=content_type)
+            self.assertEqual(response.status_code, 200)
+            return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_ndjson_reports_errors_and_progress(self):
+        body = '\n'.join([
+            json.dumps({'title': 'One', 'text': 'Body'}),
+            json.dumps({'title': ' ', 'text': 'Body'}),
+            '{not json',
+            '',
+            json.dumps({'title': 'Two', 'text': 'Body', 'id': 999}),
+            json.dumps({'title': 'Three', 'text': 'Body'}),
+        ])
+        events = self.upload(body, 'application/x-ndjson')
+        self.assertEqual([event['event'] for event in events], ['error', 'error', 'progress', 'progress', 'done'])
+        self.assertEqual(events[0]['line'], 2)
+        self.assertIn('title', events[0]['errors'])
+        self.assertEqual(events[1]['line'], 3)
+        self.assertEqual(events[-1], {'event': 'done', 'lines': 6, 'created': 3, 'failed': 2})
+        titles = list(Info.objects.filter(user=self.user).order_by('id').values_list('title', flat=True))
+        self.assertEqual(titles, ['One', 'Two', 'Three'])
+        self.assertNotEqual(Info.objects.get(title='Two').pk, 999)
+
+    def test_import_invalidates_list_cache(self):
+        self.client.get(reverse('info-list'))
+        self.upload(json.dumps({'title': 'New', 'text': 'Body'}), 'application/x-ndjson')
+        self.assertEqual(len(self.client.get(reverse('info-list')).json()['results']), 1)
+
+    def test_csv(self):
+        body = '﻿title,text\r\nFirst,"multi\r\nline"\r\n,missing title\r\nSecond,Body\r\n'
+        events = self.upload(body.encode(), 'text/csv')
+        self.assertEqual(events[0], {'event': 'error', 'line': 4, 'errors': {'title': ['This field may not be blank.']}})
+        self.assertEqual(events[-1]['created'], 2)
+        self.assertEqual(list(Info.objects.filter(user=self.user).values_list('text', flat=True).order_by('id')),
+                         ['multi\r\nline', 'Body'])
+
+    def test_rejects_unknown_content_type(self):
+        response = self.client.post(reverse('info-import'), {'title': 'x'}, format='json')
+        self.assertEqual(response.status_code, 415)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as upload:
+            upload.write('title,text\nOne,Body\nTwo,Body\nThree,Body\n')
+            upload.flush()
+            out = io.StringIO()
+            call_command('import_notes', upload.name, user='alice', stdout=out)
+        self.assertEqual(Info.objects.filter(user=self.user).count(), 3)
+        self.assertIn('Imported 3 notes, 0 failed', out.getvalue())
@@ -0,0 +1,54 @@
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # Token bucket on top of DRF's rate settings: a rate of "10/min" allows a
+    # burst of 10 and then refills one token every 6 seconds. Each key stores
+    # only (tokens, timestamp), so buckets stay small and expire when full.
+    # Concurrent requests for one key may race on the read-modify-write, which
+    # at worst lets a request or two through.
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        tokens, stamp = self.cache.get(self.key, (self.num_requests, now))
+        self.tokens = min(self.num_requests, tokens + (now - stamp) * self.num_requests / self.duration)
+        if self.tokens < 1:
+            return False
+        self.cache.set(self.key, (self.tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class ClientIPThrottle(TokenBucketThrottle):
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginIPThrottle(ClientIPThrottle):
+    scope = 'login_ip'
+
+
+class RegisterIPThrottle(ClientIPThrottle):
+    scope = 'register_ip'
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    # Keyed on the submitted username, so credential stuffing against one
+    # account is limited however many addresses it comes from.
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': username.lower()}
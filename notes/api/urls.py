@@ -1,30 +1,30 @@
 from django.urls import path, re_path
-from .views import InfoList, InfoDetail, RegisterView, LoginView
+from .views import InfoList, InfoDetail, InfoBulk, InfoSync, InfoExport, InfoImport, InfoRevisionList, InfoRevisionDetail, InfoRevisionRestore, RegisterView, LoginView
+from .async_views import AsyncInfoList, AsyncInfoDetail
 from rest_framework_simplejwt.views import TokenRefreshView
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from django.conf import settings
+from .schema import schema_view, schema_document
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Info API Documentation",
-        default_version='v1',
-        description="CRUD APP WITH JWT Authentication",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@infoapi.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+# Outside DEBUG the UI pages point at the precomputed document (SPEC_URL) and
+# can be cached themselves; in DEBUG everything is generated live.
+ui_cache_timeout = 0 if settings.API_SCHEMA_LIVE else settings.API_SCHEMA_MAX_AGE
 
 urlpatterns = [
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_document, name='schema-json'),
+    path('swagger/', schema_view.with_ui('swagger', cache_timeout=ui_cache_timeout), name='schema-swagger-ui'),
+    path('redoc/', schema_view.with_ui('redoc', cache_timeout=ui_cache_timeout), name='schema-redoc'),
     path('register/', RegisterView.as_view(), name='api-register'),
     path('login/', LoginView.as_view(), name='api-login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('info/', InfoList.as_view(), name='info-list'),
     path('info/<int:pk>/', InfoDetail.as_view(), name='info-detail'),
+    path('info/<int:pk>/revisions/', InfoRevisionList.as_view(), name='info-revisions'),
+    path('info/<int:pk>/revisions/<int:number>/', InfoRevisionDetail.as_view(), name='info-revision-detail'),
+    path('info/<int:pk>/revisions/<int:number>/restore/', InfoRevisionRestore.as_view(), name='info-revision-restore'),
+    path('info/bulk/', InfoBulk.as_view(), name='info-bulk'),
+    path('info/sync/', InfoSync.as_view(), name='info-sync'),
+    path('export/', InfoExport.as_view(), name='info-export'),
+    path('import/', InfoImport.as_view(), name='info-import'),
+    path('async/info/', AsyncInfoList.as_view(), name='async-info-list'),
+    path('async/info/<int:pk>/', AsyncInfoDetail.as_view(), name='async-info-detail'),
 ]
\ No newline at end of file
@@ -1,7 +1,19 @@
+from datetime import timedelta
 from django.shortcuts import render
-from django.http import JsonResponse, Http404
-from .models import Info
-from .serializers import InfoSerializer, UserSerializer
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from .models import Info, InfoTombstone
+from .serializers import InfoSerializer, InfoRevisionSerializer, InfoRevisionDetailSerializer, UserSerializer
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle
+from .pagination import KeysetPagination, SearchPagination, decode_cursor, encode_cursor
+from . import search
+from . import services
+from . import revisions
+from . import projection
+from . import export
+from . import imports
+from . import cache as info_cache
+from . import conditional
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view
@@ -9,12 +21,17 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
 
     @swagger_auto_schema(
         operation_description="Register a new user account",
@@ -67,6 +84,22 @@ class RegisterView(APIView):
                     }
                 }
             ),
+            429: openapi.Response(
+                description="Too Many Requests - Rate limit exceeded, see Retry-After",
+                examples={
+                    "application/json": {
+                        "detail": "Request was throttled. Expected available in 6 seconds."
+                    }
+                }
+            ),
+            503: openapi.Response(
+                description="Service Unavailable - Password hashing is saturated, see Retry-After",
+                examples={
+                    "application/json": {
+                        "detail": "Too many sign-ins in progress, try again shortly. Expected available in 1 second."
+                    }
+                }
+            ),
         },
         tags=['Authentication']
     )
@@ -86,6 +119,7 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
 
     @swagger_auto_schema(
         operation_description="Login with username and password to get JWT tokens",
@@ -133,6 +167,22 @@ class LoginView(APIView):
                     }
                 }
             ),
+            429: openapi.Response(
+                description="Too Many Requests - Rate limit exceeded, see Retry-After",
+                examples={
+                    "application/json": {
+                        "detail": "Request was throttled. Expected available in 6 seconds."
+                    }
+                }
+            ),
+            503: openapi.Response(
+                description="Service Unavailable - Password hashing is saturated, see Retry-After",
+                examples={
+                    "application/json": {
+                        "detail": "Too many sign-ins in progress, try again shortly. Expected available in 1 second."
+                    }
+                }
+            ),
         },
         tags=['Authentication']
     )
@@ -163,7 +213,7 @@ class InfoList(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Get list of all Info objects. Requires JWT authentication.",
+        operation_description="Get a page of Info objects, most recently updated first. Requires JWT authentication.",
         manual_parameters=[
             openapi.Parameter(
                 'Authorization',
@@ -171,21 +221,66 @@ class InfoList(APIView):
                 description="Bearer <JWT Token>",
                 type=openapi.TYPE_STRING,
                 required=True
-            )
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Opaque cursor taken from the 'next' link of the previous page",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Number of items per page (max 500)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Comma separated list of fields to return, e.g. id,title,updated_at",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'q',
+                openapi.IN_QUERY,
+                description="Full-text search over title and text. Results are ranked best match first, "
+                            "carry 'rank' and a highlighted 'snippet', and page with 'page' instead of 'cursor'",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page',
+                openapi.IN_QUERY,
+                description="Page number of the search results (only with 'q')",
+                type=openapi.TYPE_INTEGER
+            ),
         ],
         responses={
             200: openapi.Response(
-                description="List of Info objects",
+                description="Page of Info objects",
                 examples={
-                    "application/json": [
-                        {
-                            "id": 1,
-                            "title": "Sample Title",
-                            "text": "Sample text content"
-                        }
-                    ]
+                    "application/json": {
+                        "next": "http://localhost:8000/api/info/?cursor=MjAyNS0xMi0xMFQwNzo1NDowMCswMDowMHwx",
+                        "results": [
+                            {
+                                "id": 1,
+                                "title": "Sample Title",
+                                "text": "Sample text content"
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Bad Request - Unknown field requested",
+                examples={
+                    "application/json": {
+                        "error": "Unknown fields: body"
+                    }
                 }
             ),
+            304: openapi.Response(
+                description="Not Modified - The ETag in If-None-Match is still current"
+            ),
             401: openapi.Response(
                 description="Unauthorized - Invalid or missing token",
                 examples={
@@ -198,9 +293,50 @@ class InfoList(APIView):
         tags=['Info CRUD']
     )
     def get(self, request):
-        info = Info.objects.filter(user=request.user)
-        serializer = InfoSerializer(info, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cache_key = info_cache.list_key(request.user.pk, request.build_absolute_uri())
+        entry = info_cache.get(cache_key)
+        if entry is not None:
+            etag = entry['etag']
+        else:
+            etag = conditional.list_etag(services.notes_for(request.user), request)
+
+        not_modified = conditional.evaluate(request, etag)
+        if not_modified:
+            return not_modified
+        if entry is not None:
+            return Response(entry['data'], status=status.HTTP_200_OK, headers={'X-Cache': 'HIT', 'ETag': etag})
+
+        fields = request.query_params.get('fields')
+        if fields:
+            fields = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = set(fields) - set(InfoSerializer.Meta.fields)
+            if unknown:
+                return Response({
+                    'error': f"Unknown fields: {', '.join(sorted(unknown))}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            fields = None
+
+        query = request.query_params.get('q', '').strip()
+        if query:
+            # Search results carry a float rank and stay on the serializer.
+            info = services.notes_for(request.user).select_related('user')
+            if fields is not None and 'text' not in fields:
+                info = info.defer('text')
+            paginator = SearchPagination()
+            page = paginator.paginate_queryset(search.search(info, query), request, view=self)
+            results = InfoSerializer(page, many=True, fields=fields).data
+            for item, match in zip(results, page):
+                item['rank'] = match.rank
+                item['snippet'] = search.highlight(match.snippet)
+            data = paginator.get_paginated_response(results).data
+        else:
+            names = projection.field_names(fields)
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(projection.project(services.notes_for(request.user), names), request, view=self)
+            data = projection.Projected(paginator.get_paginated_response(projection.to_dicts(page, names)).data)
+        info_cache.set(cache_key, {'data': data, 'etag': etag})
+        return Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'MISS', 'ETag': etag})
     
     @swagger_auto_schema(
         operation_description="Create a new Info object. Requires JWT authentication.",
@@ -277,11 +413,8 @@ class InfoList(APIView):
 class InfoDetail(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, pk):
-        try:
-            return Info.objects.get(pk=pk, user=self.request.user)
-        except Info.DoesNotExist:
-            return None
+    def get_object(self, pk, lock=False):
+        return services.get_note(self.request.user, pk, lock=lock)
     
     @swagger_auto_schema(
         operation_description="Retrieve a specific Info object by ID. Requires JWT authentication.",
@@ -313,6 +446,9 @@ class InfoDetail(APIView):
                     }
                 }
             ),
+            304: openapi.Response(
+                description="Not Modified - The ETag in If-None-Match is still current"
+            ),
             401: openapi.Response(
                 description="Unauthorized - Invalid or missing token",
                 examples={
@@ -325,14 +461,31 @@ class InfoDetail(APIView):
         tags=['Info CRUD']
     )
     def get(self, request, pk):
-        info = self.get_object(pk)
-        if not info:
-            return Response({
-                'error': 'Info not found'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        serializer = InfoSerializer(info)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cache_key = info_cache.detail_key(request.user.pk, pk)
+        data = info_cache.get(cache_key)
+        if data is not None:
+            updated_at = data['updated_at']
+        else:
+            names = projection.field_names()
+            row = projection.project(services.notes_for(request.user).filter(pk=pk), names).first()
+            if not row:
+                return Response({
+                    'error': 'Info not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            updated_at = row.updated_at
+
+        etag = conditional.detail_etag(pk, updated_at)
+        not_modified = conditional.evaluate(request, etag, updated_at)
+        if not_modified:
+            return not_modified
+
+        headers = conditional.validator_headers(etag, updated_at)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT', **headers})
+
+        data = projection.Projected(projection.to_dicts([row], names)[0])
+        info_cache.set(cache_key, data)
+        return Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'MISS', **headers})
     
     @swagger_auto_schema(
         operation_description="Update an Info object (partial update supported). Requires JWT authentication.",
@@ -390,6 +543,9 @@ class InfoDetail(APIView):
                     }
                 }
             ),
+            412: openapi.Response(
+                description="Precondition Failed - The ETag in If-Match is no longer current"
+            ),
             401: openapi.Response(
                 description="Unauthorized - Invalid or missing token",
                 examples={
@@ -401,12 +557,19 @@ class InfoDetail(APIView):
         },
         tags=['Info CRUD']
     )
+    @transaction.atomic
     def put(self, request, pk):
-        info = self.get_object(pk)
+        # If-Match is checked against the locked row, so no other write can
+        # land between the check and this one.
+        info = self.get_object(pk, lock=True)
         if not info:
             return Response({
                 'error': 'Info not found'
             }, status=status.HTTP_404_NOT_FOUND)
+
+        precondition_failed = conditional.evaluate(request, conditional.detail_etag(info.pk, info.updated_at), info.updated_at)
+        if precondition_failed:
+            return precondition_failed
         
         serializer = InfoSerializer(info, data=request.data, partial=True)
         if serializer.is_valid():
@@ -414,7 +577,8 @@ class InfoDetail(APIView):
             return Response({
                 'message': 'Info updated successfully',
                 'data': serializer.data
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK, headers=conditional.validator_headers(
+                conditional.detail_etag(info.pk, info.updated_at), info.updated_at))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @swagger_auto_schema(
@@ -445,6 +609,9 @@ class InfoDetail(APIView):
                     }
                 }
             ),
+            412: openapi.Response(
+                description="Precondition Failed - The ETag in If-Match is no longer current"
+            ),
             401: openapi.Response(
                 description="Unauthorized - Invalid or missing token",
                 examples={
@@ -456,14 +623,663 @@ class InfoDetail(APIView):
         },
         tags=['Info CRUD']
     )
+    @transaction.atomic
     def delete(self, request, pk):
-        info = self.get_object(pk)
+        info = self.get_object(pk, lock=True)
         if not info:
             return Response({
                 'error': 'Info not found'
             }, status=status.HTTP_404_NOT_FOUND)
+
+        precondition_failed = conditional.evaluate(request, conditional.detail_etag(info.pk, info.updated_at), info.updated_at)
+        if precondition_failed:
+            return precondition_failed
         
-        info.delete()
+        services.delete_note(info)
         return Response({
             'message': 'Info deleted successfully'
-        }, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+class InfoBulk(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Apply a batch of create, update and delete operations in one transaction. "
+                              "Each operation is validated on its own; invalid ones are reported and skipped. "
+                              "Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['operations'],
+            properties={
+                'operations': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    description='Operations to apply (max 500)',
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        required=['op'],
+                        properties={
+                            'op': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete']),
+                            'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Required for update and delete'),
+                            'title': openapi.Schema(type=openapi.TYPE_STRING),
+                            'text': openapi.Schema(type=openapi.TYPE_STRING),
+                        },
+                    ),
+                    example=[
+                        {'op': 'create', 'title': 'New Info', 'text': 'New text content.'},
+                        {'op': 'update', 'id': 1, 'title': 'Updated Title'},
+                        {'op': 'delete', 'id': 2},
+                    ]
+                ),
+            },
+        ),
+        responses={
+            200: openapi.Response(
+                description="Per-operation results, in request order",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {"index": 0, "op": "create", "status": 201, "data": {"id": 3, "title": "New Info", "text": "New text content."}},
+                            {"index": 1, "op": "update", "status": 400, "errors": {"title": ["Title cannot be empty."]}},
+                            {"index": 2, "op": "delete", "status": 404, "errors": {"id": ["Info not found"]}}
+                        ]
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Bad Request - Malformed batch",
+                examples={
+                    "application/json": {
+                        "error": "Provide between 1 and 500 operations"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info CRUD']
+    )
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        max_operations = settings.INFO_BULK_MAX_OPERATIONS
+        if not isinstance(operations, list) or not 0 < len(operations) <= max_operations:
+            return Response({
+                'error': f'Provide between 1 and {max_operations} operations'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # bool is an int subclass, and lists or objects are not hashable.
+        target_ids = {
+            operation.get('id') for operation in operations
+            if isinstance(operation, dict) and operation.get('op') in ('update', 'delete')
+            and type(operation.get('id')) is int
+        }
+        existing = services.notes_for(request.user).filter(id__in=target_ids).in_bulk()
+        for info in existing.values():
+            # Serializing the results reads info.user.
+            info.user = request.user
+
+        results = []
+        to_create, to_update, to_delete = [], {}, set()
+        now = timezone.now()
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            result = {'index': index, 'op': op}
+            results.append(result)
+
+            if op == 'create':
+                serializer = InfoSerializer(data=operation)
+                if not serializer.is_valid():
+                    result.update(status=status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+                    continue
+                info = Info(user=request.user, **serializer.validated_data)
+                to_create.append((result, info))
+            elif op in ('update', 'delete'):
+                if type(operation.get('id')) is not int:
+                    result.update(status=status.HTTP_400_BAD_REQUEST, errors={'id': ['A valid integer is required.']})
+                    continue
+                info = existing.get(operation['id'])
+                if info is None or info.pk in to_delete:
+                    result.update(status=status.HTTP_404_NOT_FOUND, errors={'id': ['Info not found']})
+                    continue
+                if op == 'delete':
+                    to_delete.add(info.pk)
+                    result.update(status=status.HTTP_204_NO_CONTENT)
+                    continue
+                serializer = InfoSerializer(info, data=operation, partial=True)
+                if not serializer.is_valid():
+                    result.update(status=status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+                    continue
+                for field, value in serializer.validated_data.items():
+                    setattr(info, field, value)
+                info.updated_at = now
+                to_update[info.pk] = info
+                result.update(status=status.HTTP_200_OK, info=info)
+            else:
+                result.update(status=status.HTTP_400_BAD_REQUEST, errors={'op': ['Must be one of: create, update, delete.']})
+
+        with transaction.atomic():
+            services.bulk_create_notes(request.user, [info for _, info in to_create])
+            services.bulk_update_notes([info for pk, info in to_update.items() if pk not in to_delete])
+            services.delete_notes(request.user, [existing[pk] for pk in to_delete])
+            # bulk_update bypasses the post_save signal.
+            info_cache.bump_version(request.user.pk)
+
+        for result, info in to_create:
+            result.update(status=status.HTTP_201_CREATED, data=InfoSerializer(info).data)
+        for result in results:
+            if 'info' in result:
+                result['data'] = InfoSerializer(result.pop('info')).data
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class InfoSync(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get the Info objects created or updated, and the ids deleted, since a sync cursor. "
+                              "Omit 'since' for the initial sync and keep the returned cursor for the next call. "
+                              "Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'since',
+                openapi.IN_QUERY,
+                description="Cursor returned by the previous sync",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Maximum number of changes to return (max 500)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Changes since the cursor, oldest first",
+                examples={
+                    "application/json": {
+                        "changes": [
+                            {
+                                "id": 1,
+                                "title": "Sample Title",
+                                "text": "Sample text content"
+                            }
+                        ],
+                        "deleted": [2],
+                        "cursor": "MjAyNS0xMi0xMFQwNzo1NDowMCswMDowMHww",
+                        "has_more": False
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Not Found - Malformed cursor",
+                examples={
+                    "application/json": {
+                        "detail": "Invalid cursor"
+                    }
+                }
+            ),
+            410: openapi.Response(
+                description="Gone - Cursor is older than the deletion history, run a full sync",
+                examples={
+                    "application/json": {
+                        "error": "Sync cursor expired, run a full sync"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info CRUD']
+    )
+    def get(self, request):
+        page_size = KeysetPagination().get_page_size(request)
+        now = timezone.now()
+        # Leave out writes from the last few seconds: a transaction may still
+        # be about to commit a row stamped just behind the cursor.
+        upper = now - timedelta(seconds=settings.INFO_SYNC_SETTLE_SECONDS)
+
+        since = request.query_params.get('since')
+        if since:
+            since_at, since_id = decode_cursor(since)
+            if since_at < now - settings.INFO_TOMBSTONE_RETENTION:
+                return Response({
+                    'error': 'Sync cursor expired, run a full sync'
+                }, status=status.HTTP_410_GONE)
+            changed = services.notes_for(request.user).filter(
+                Q(updated_at__gt=since_at) | Q(updated_at=since_at, id__gt=since_id),
+                updated_at__gte=since_at,
+            )
+            deleted = InfoTombstone.objects.filter(
+                Q(deleted_at__gt=since_at) | Q(deleted_at=since_at, info_id__gt=since_id),
+                deleted_at__gte=since_at,
+            )
+        else:
+            changed = services.notes_for(request.user)
+            deleted = InfoTombstone.objects.all()
+
+        changed = changed.filter(updated_at__lt=upper).select_related('user').order_by('updated_at', 'id')
+        deleted = deleted.filter(user=request.user, deleted_at__lt=upper).order_by('deleted_at', 'info_id')
+        events = sorted(
+            [(info.updated_at, info.pk, info) for info in changed[:page_size + 1]] +
+            [(tombstone.deleted_at, tombstone.info_id, None) for tombstone in deleted[:page_size + 1]],
+            key=lambda event: event[:2],
+        )
+        has_more = len(events) > page_size
+        events = events[:page_size]
+
+        if has_more:
+            cursor = encode_cursor(*events[-1][:2])
+        else:
+            # Everything before the upper bound has been returned.
+            cursor = encode_cursor(upper, 0)
+
+        return Response({
+            'changes': InfoSerializer([info for _, _, info in events if info is not None], many=True).data,
+            'deleted': [pk for _, pk, info in events if info is None],
+            'cursor': cursor,
+            'has_more': has_more,
+        }, status=status.HTTP_200_OK)
+
+
+class InfoExport(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Stream every Info object of the authenticated user as a JSON array "
+                              "or as NDJSON, optionally gzip-compressed. Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="JSON array or newline-delimited JSON",
+                type=openapi.TYPE_STRING,
+                enum=list(export.FORMATS),
+                default='json'
+            ),
+            openapi.Parameter(
+                'gzip',
+                openapi.IN_QUERY,
+                description="Compress the stream (Content-Encoding: gzip)",
+                type=openapi.TYPE_BOOLEAN
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="The whole collection, oldest first",
+                examples={
+                    "application/json": [
+                        {
+                            "id": 1,
+                            "title": "Sample Title",
+                            "text": "Sample text content"
+                        }
+                    ]
+                }
+            ),
+            400: openapi.Response(
+                description="Bad Request - Unknown output format",
+                examples={
+                    "application/json": {
+                        "error": "output must be one of: json, ndjson"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info CRUD']
+    )
+    def get(self, request):
+        fmt = request.query_params.get('output', 'json')
+        if fmt not in export.FORMATS:
+            return Response({
+                'error': f"output must be one of: {', '.join(export.FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        gzip = request.query_params.get('gzip', '').lower() in ('1', 'true')
+
+        response = StreamingHttpResponse(
+            export.stream(request.user, fmt, gzip=gzip),
+            content_type=export.FORMATS[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="info-export.{fmt}"'
+        if gzip:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+
+class InfoImport(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Import Info objects from an NDJSON or CSV request body. The body is "
+                              "read line by line, each record is validated like a normal create and valid records "
+                              "are written in batches. The response streams NDJSON events as the import runs. "
+                              "Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'Content-Type',
+                openapi.IN_HEADER,
+                description="application/x-ndjson (one JSON object per line) or text/csv (header row with title,text)",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="NDJSON stream of error and progress events, ending with a done (or aborted) event",
+                examples={
+                    "application/x-ndjson": [
+                        {"event": "error", "line": 3, "errors": {"title": ["Title cannot be empty."]}},
+                        {"event": "progress", "lines": 1001, "created": 1000, "failed": 1},
+                        {"event": "done", "lines": 1500, "created": 1499, "failed": 1}
+                    ]
+                }
+            ),
+            415: openapi.Response(
+                description="Unsupported Media Type - Body is neither NDJSON nor CSV",
+                examples={
+                    "application/json": {
+                        "error": "Send application/x-ndjson or text/csv"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info CRUD']
+    )
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        fmt = next((name for name, types in imports.FORMATS.items() if content_type in types), None)
+        if fmt is None:
+            return Response({
+                'error': 'Send application/x-ndjson or text/csv'
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # Read the raw body stream line by line instead of request.data, which
+        # would load the whole upload into memory first.
+        lines = request.stream or ()
+        renderer = JSONRenderer()
+        events = (renderer.render(event) + b'\n' for event in imports.run(request.user, lines, fmt))
+        return StreamingHttpResponse(events, content_type='application/x-ndjson')
+
+
+class InfoRevisionList(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="List the earlier versions of an Info object, newest first. Each update records "
+                              "the version it replaced; old revisions may have been compacted away. "
+                              "Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'before',
+                openapi.IN_QUERY,
+                description="Only revisions numbered below this (the 'next' value of the previous page)",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Revisions retrieved successfully",
+                examples={
+                    "application/json": {
+                        "results": [
+                            {"number": 2, "title": "Sample Title", "updated_at": "2024-01-02T10:00:00Z"},
+                            {"number": 1, "title": "Sample Title", "updated_at": "2024-01-01T10:00:00Z"}
+                        ],
+                        "next": None
+                    }
+                }
+            ),
+            400: openapi.Response(
+                description="Bad Request - Invalid 'before'",
+                examples={
+                    "application/json": {
+                        "error": "'before' must be a positive integer"
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Not Found - Info object does not exist",
+                examples={
+                    "application/json": {
+                        "error": "Info not found"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info Revisions']
+    )
+    def get(self, request, pk):
+        info = services.get_note(request.user, pk)
+        if not info:
+            return Response({
+                'error': 'Info not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        queryset = revisions.revisions_for(info).only('number', 'title', 'updated_at').order_by('-number')
+        before = request.query_params.get('before')
+        if before is not None:
+            if not before.isdigit():
+                return Response({
+                    'error': "'before' must be a positive integer"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(number__lt=int(before))
+
+        page_size = settings.INFO_REVISION_PAGE_SIZE
+        page = list(queryset[:page_size + 1])
+        next_before = page[page_size - 1].number if len(page) > page_size else None
+        return Response({
+            'results': InfoRevisionSerializer(page[:page_size], many=True).data,
+            'next': next_before,
+        }, status=status.HTTP_200_OK)
+
+
+class InfoRevisionDetail(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Retrieve an earlier version of an Info object, rebuilt from its stored "
+                              "deltas. Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Revision retrieved successfully",
+                examples={
+                    "application/json": {
+                        "number": 1,
+                        "title": "Sample Title",
+                        "updated_at": "2024-01-01T10:00:00Z",
+                        "text": "Sample text content"
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Not Found - Info object or revision does not exist",
+                examples={
+                    "application/json": {
+                        "error": "Revision not found"
+                    }
+                }
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info Revisions']
+    )
+    def get(self, request, pk, number):
+        info = services.get_note(request.user, pk)
+        if not info:
+            return Response({
+                'error': 'Info not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        revision = revisions.get_revision(info, number)
+        if revision is None:
+            return Response({
+                'error': 'Revision not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(InfoRevisionDetailSerializer(revision).data, status=status.HTTP_200_OK)
+
+
+class InfoRevisionRestore(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Restore an Info object to an earlier version. The version being replaced is "
+                              "recorded as a new revision, so a restore can itself be undone. "
+                              "Requires JWT authentication.",
+        manual_parameters=[
+            openapi.Parameter(
+                'Authorization',
+                openapi.IN_HEADER,
+                description="Bearer <JWT Token>",
+                type=openapi.TYPE_STRING,
+                required=True
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Info restored successfully",
+                examples={
+                    "application/json": {
+                        "message": "Info restored from revision 1",
+                        "data": {
+                            "id": 1,
+                            "title": "Sample Title",
+                            "text": "Sample text content"
+                        }
+                    }
+                }
+            ),
+            404: openapi.Response(
+                description="Not Found - Info object or revision does not exist",
+                examples={
+                    "application/json": {
+                        "error": "Revision not found"
+                    }
+                }
+            ),
+            412: openapi.Response(
+                description="Precondition Failed - The ETag in If-Match is no longer current"
+            ),
+            401: openapi.Response(
+                description="Unauthorized - Invalid or missing token",
+                examples={
+                    "application/json": {
+                        "detail": "Authentication credentials were not provided."
+                    }
+                }
+            ),
+        },
+        tags=['Info Revisions']
+    )
+    @transaction.atomic
+    def post(self, request, pk, number):
+        info = services.get_note(request.user, pk, lock=True)
+        if not info:
+            return Response({
+                'error': 'Info not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        precondition_failed = conditional.evaluate(request, conditional.detail_etag(info.pk, info.updated_at), info.updated_at)
+        if precondition_failed:
+            return precondition_failed
+
+        revision = revisions.get_revision(info, number)
+        if revision is None:
+            return Response({
+                'error': 'Revision not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        services.restore_note(info, revision)
+        return Response({
+            'message': f'Info restored from revision {number}',
+            'data': InfoSerializer(info).data
+        }, status=status.HTTP_200_OK, headers=conditional.validator_headers(
+            conditional.detail_etag(info.pk, info.updated_at), info.updated_at))
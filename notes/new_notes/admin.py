@@ -1,7 +1 @@
-from django.contrib import admin
-from . import models
-
-class NotesAdmin(admin.ModelAdmin):
-    list_display=("title",)
-
-admin.site.register(models.Notes,NotesAdmin)
\ No newline at end of file
+# Smart notes are api.models.Info rows, registered in api/admin.py.
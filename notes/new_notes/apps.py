@@ -2,4 +2,4 @@ from django.apps import AppConfig
 
 class NewNotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'new_notes'
\ No newline at end of file
+    name = 'new_notes'
@@ -0,0 +1,34 @@
+import hashlib
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from api import cache as info_cache
+
+# The smart notes list is cached under the same per-user version as the
+# Info API (api.cache), so a write from either surface invalidates both.
+
+
+def count_key(user_id, version, query):
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return f'notes:{user_id}:{version}:count:{digest}'
+
+
+class CachedCountPaginator(Paginator):
+    # The COUNT(*) behind page numbers grows with the account, so it is
+    # stored under the user's version like the fragments themselves.
+
+    def __init__(self, *args, cache_key, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_key = cache_key
+
+    @cached_property
+    def count(self):
+        if not info_cache.enabled():
+            return super().count
+        count = info_cache.get_cache().get(self.cache_key)
+        if count is None:
+            count = self.object_list.count()
+            info_cache.get_cache().set(self.cache_key, count, timeout=settings.NOTES_CACHE_TIMEOUT)
+        return count
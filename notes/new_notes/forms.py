@@ -1,9 +1,9 @@
 from django import forms
-from .models import Notes
+from api.models import Info
 
 class NotesForm (forms.ModelForm):
     class Meta:
-        model=Notes
+        model=Info
         fields=('title','text')
         widgets={
             'title':forms.TextInput(attrs={'class':'form-control my-3'}),
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+from notes.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('new_notes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='notes',
+            options={'ordering': ['-id']},
+        ),
+        AddIndexConcurrently(
+            model_name='notes',
+            index=models.Index(fields=['user', '-id'], name='new_notes_user_id_idx'),
+        ),
+    ]
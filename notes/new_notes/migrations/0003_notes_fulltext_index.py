@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from notes.migration_operations import CreateFullTextIndex
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('new_notes', '0002_notes_ordering_and_user_id_index'),
+    ]
+
+    operations = [
+        CreateFullTextIndex(table='new_notes_notes'),
+    ]
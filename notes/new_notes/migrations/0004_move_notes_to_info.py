@@ -0,0 +1,39 @@
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+# Copies smart notes into api.Info in small batches, each in its own short
+# transaction that also deletes the copied Notes rows. Neither table is
+# locked for long, and an interrupted run resumes where it stopped without
+# duplicating anything. Note ids are not kept: they would collide with
+# existing Info ids.
+def move_notes_to_info(apps, schema_editor):
+    Notes = apps.get_model('new_notes', 'Notes')
+    Info = apps.get_model('api', 'Info')
+    db = schema_editor.connection.alias
+    while True:
+        with transaction.atomic(using=db):
+            batch = list(Notes.objects.using(db).order_by('id')[:BATCH_SIZE])
+            if not batch:
+                break
+            Info.objects.using(db).bulk_create(
+                Info(user_id=note.user_id, title=note.title, text=note.text) for note in batch
+            )
+            Notes.objects.using(db).filter(id__in=[note.id for note in batch]).delete()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('new_notes', '0003_notes_fulltext_index'),
+        ('api', '0004_info_fulltext_index'),
+    ]
+
+    operations = [
+        # Merged rows cannot be told apart from native Info rows again, so
+        # reversing leaves them in Info.
+        migrations.RunPython(move_notes_to_info, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from notes.migration_operations import DropFullTextIndex
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('new_notes', '0004_move_notes_to_info'),
+    ]
+
+    operations = [
+        DropFullTextIndex(table='new_notes_notes'),
+        migrations.DeleteModel(
+            name='Notes',
+        ),
+    ]
@@ -1,10 +1,2 @@
-from django.db import models
-from django.contrib.auth.models import User
-
-class Notes(models.Model):
-    title=models.CharField(max_length=200)
-    text=models.TextField()
-    user=models.ForeignKey(User,on_delete=models.CASCADE,related_name='notes')
-
-    def __str__(self):
-        return self.title
\ No newline at end of file
+# Smart notes are stored as api.models.Info; see api.services. The Notes
+# table was merged into it by migration 0004_move_notes_to_info.
@@ -0,0 +1,11 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from api.search import highlight as highlight_snippet
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    return mark_safe(highlight_snippet(snippet))
@@ -1,3 +1,208 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from api import cache as info_cache
+from api import services
+from api.models import Info
+
+
+class NotesQueryBudgetTests(TestCase):
+    # Two queries load the session and its user, the rest are the view's own
+    # work. Budgets must not grow with the number of notes a user owns.
+    note_counts = (1, 25)
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.client.force_login(self.user)
+
+    def seed(self, count):
+        info_cache.get_cache().clear()
+        Info.objects.filter(user=self.user).delete()
+        Info.objects.bulk_create(
+            Info(user=self.user, title=f'Title {i}', text=f'Text {i}') for i in range(count)
+        )
+        return Info.objects.filter(user=self.user).first()
+
+    def assertBudget(self, queries, method, name, detail=False, data=None):
+        for count in self.note_counts:
+            note = self.seed(count)
+            url = reverse(name, args=[note.pk]) if detail else reverse(name)
+            with self.subTest(count=count), self.assertNumQueries(queries):
+                response = getattr(self.client, method)(url, data)
+            self.assertIn(response.status_code, (200, 302))
+
+    def test_list(self):
+        # Cold cache: the page count and the page itself.
+        self.assertBudget(4, 'get', 'notes.list')
+
+    def test_detail(self):
+        self.assertBudget(3, 'get', 'notes.detail', detail=True)
+
+    def test_create_form(self):
+        self.assertBudget(2, 'get', 'notes.new')
+
+    def test_create(self):
+        self.assertBudget(3, 'post', 'notes.new', data={'title': 'New', 'text': 'Body'})
+
+    def test_update_form(self):
+        self.assertBudget(3, 'get', 'notes.update', detail=True)
+
+    def test_update(self):
+        # Recording the replaced version adds the locked read and its insert.
+        self.assertBudget(6, 'post', 'notes.update', detail=True, data={'title': 'Changed', 'text': 'Body'})
+
+    def test_delete_confirmation(self):
+        self.assertBudget(3, 'get', 'notes.delete', detail=True)
+
+    def test_delete(self):
+        # The delete, the note's revisions and the sync tombstone it leaves
+        # behind.
+        self.assertBudget(6, 'post', 'notes.delete', detail=True)
+
+
+@override_settings(NOTES_PAGE_SIZE=2, NOTES_PREVIEW_LENGTH=10)
+class NotesListTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                Info.objects.create(user=self.user, title=f'Title {i}', text=f'Long text number {i}')
+
+    def test_pages_show_titles_and_previews(self):
+        response = self.client.get(reverse('notes.list'))
+        self.assertContains(response, 'Title 2')
+        self.assertContains(response, 'Long text…')
+        self.assertNotContains(response, 'Long text number')
+        self.assertContains(response, 'Page 1 of 2')
+        response = self.client.get(reverse('notes.list'), {'page': 2})
+        self.assertContains(response, 'Title 0')
+        self.assertNotContains(response, 'Title 2')
+
+    def test_repeat_render_is_served_from_fragment_cache(self):
+        self.client.get(reverse('notes.list'))
+        # Only the session and its user are loaded.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('notes.list'))
+        self.assertContains(response, 'Title 2')
+        self.assertContains(response, 'Page 1 of 2')
+
+    def test_writes_invalidate_the_fragment(self):
+        self.client.get(reverse('notes.list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notes.new'), {'title': 'Fresh', 'text': 'Body'})
+        response = self.client.get(reverse('notes.list'))
+        self.assertContains(response, 'Fresh')
+        self.assertContains(response, 'Page 1 of 2')
+
+        note = Info.objects.get(title='Fresh')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notes.delete', args=[note.pk]))
+        self.assertNotContains(self.client.get(reverse('notes.list')), 'Fresh')
+
+
+class NotesSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.client.force_login(self.user)
+
+    def test_search_highlights_matches(self):
+        Info.objects.create(user=self.user, title='Recipe', text='Mix <b>flour</b> and water')
+        Info.objects.create(user=self.user, title='Other', text='Nothing here')
+        response = self.client.get(reverse('notes.list'), {'q': 'flour'})
+        self.assertEqual(len(response.context['notes']), 1)
+        self.assertContains(response, '<mark>flour</mark>')
+        self.assertNotContains(response, '<b>flour</b>', html=False)
+
+    def test_no_matches(self):
+        response = self.client.get(reverse('notes.list'), {'q': 'missing'})
+        self.assertContains(response, 'No notes match')
+
+
+class NotesIndexUsageTests(TestCase):
+    # See api.tests.InfoIndexUsageTests. SQLite may answer the list query from
+    # the foreign key index, which already ends in the implicit rowid, so only
+    # PostgreSQL is required to pick the composite index by name.
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.note = Info.objects.create(user=self.user, title='Title', text='Text')
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_list(self):
+        plan = self.explain(services.previews_for(self.user)[:25])
+        if connection.vendor == 'postgresql':
+            self.assertIn('api_info_user_updated_idx', plan)
+            self.assertNotIn('Sort', plan)
+        else:
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_detail(self):
+        plan = self.explain(services.notes_for(self.user).filter(pk=self.note.pk))
+        if connection.vendor == 'postgresql':
+            self.assertIn('api_info_pkey', plan)
+        else:
+            self.assertIn('INTEGER PRIMARY KEY', plan)
+
+
+class SharedStorageTests(TestCase):
+
+    def setUp(self):
+        info_cache.get_cache().clear()
+        self.user = User.objects.create(username='alice')
+        self.client.force_login(self.user)
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_form_writes_are_visible_to_the_api(self):
+        self.api.get(reverse('info-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notes.new'), {'title': 'From the form', 'text': 'Body'})
+        results = self.api.get(reverse('info-list')).json()['results']
+        self.assertEqual([item['title'] for item in results], ['From the form'])
+
+    def test_api_writes_are_visible_to_the_pages(self):
+        self.client.get(reverse('notes.list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.api.post(reverse('info-list'), {'title': 'From the API', 'text': 'Body'}, format='json')
+        self.assertContains(self.client.get(reverse('notes.list')), 'From the API')
+
+
+class MoveNotesMigrationTests(TransactionTestCase):
+    before = [('new_notes', '0003_notes_fulltext_index'), ('api', '0004_info_fulltext_index')]
+    after = [('new_notes', '0004_move_notes_to_info')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_notes_are_copied_into_info(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model('auth', 'User').objects.create(username='alice')
+        Notes = apps.get_model('new_notes', 'Notes')
+        Notes.objects.bulk_create(Notes(user=user, title=f'Note {i}', text='Body') for i in range(3))
+        apps.get_model('api', 'Info').objects.create(user=user, title='Existing', text='Body')
+
+        apps = self.migrate(self.after)
+        self.assertFalse(apps.get_model('new_notes', 'Notes').objects.exists())
+        titles = apps.get_model('api', 'Info').objects.filter(user_id=user.pk).values_list('title', flat=True)
+        self.assertEqual(sorted(titles), ['Existing', 'Note 0', 'Note 1', 'Note 2'])
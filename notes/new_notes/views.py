@@ -1,62 +1,93 @@
 from django.shortcuts import render
 from django.views.generic import ListView, DetailView,CreateView,UpdateView,DeleteView
-from .models import Notes 
+from api.models import Info
+from api import services
+from api import cache as info_cache
 from .forms import NotesForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
+from django.conf import settings
+from .cache import CachedCountPaginator, count_key
+
+# Smart notes are the same Info rows the REST API serves; reads and writes go
+# through api.services so both surfaces share indexes, caching and search.
 
 class NotesDeleteView(LoginRequiredMixin, DeleteView):
-    model=Notes
+    model=Info
     success_url = reverse_lazy('notes.list')
     login_url = reverse_lazy('login')
     template_name = "notes_delete.html"
         
     def get_queryset(self):
-        return self.request.user.notes.all()
+        return services.notes_for(self.request.user)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['note'] = context['object'] 
         return context
 
+    def form_valid(self, form):
+        services.delete_note(self.object)
+        return HttpResponseRedirect(self.get_success_url())
+
 class NotesUpdateView(LoginRequiredMixin, UpdateView):
-    model=Notes
+    model=Info
     success_url = reverse_lazy('notes.list')
     login_url = reverse_lazy('login')
     form_class=NotesForm
     template_name = "notes_form.html"
     
     def get_queryset(self):
-        return self.request.user.notes.all()
+        return services.notes_for(self.request.user)
+
+    def form_valid(self, form):
+        self.object = services.update_note(self.object, **form.cleaned_data)
+        return HttpResponseRedirect(self.get_success_url())
     
 class NotesCreateView(LoginRequiredMixin, CreateView):
-    model=Notes
+    model=Info
     success_url='/smart/notes/'
     form_class=NotesForm
     template_name = "notes_form.html"
     login_url="/login"
 
     def form_valid(self,form):
-        self.object=form.save(commit=False)
-        self.object.user =self.request.user 
-        self.object.save()
+        self.object = services.create_note(self.request.user, **form.cleaned_data)
         return HttpResponseRedirect(self.get_success_url())
 
 class NotesList(LoginRequiredMixin, ListView):
-    model = Notes
+    model = Info
     context_object_name = "notes"
     template_name = "notes_list.html"
     login_url="/login"
 
     def get_queryset(self):
-        return self.request.user.notes.all()
+        return services.previews_for(self.request.user, self.request.GET.get('q', '').strip())
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PAGE_SIZE
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        self.notes_version = info_cache.get_version(self.request.user.pk)
+        cache_key = count_key(self.request.user.pk, self.notes_version, self.request.GET.get('q', '').strip())
+        return CachedCountPaginator(queryset, per_page, orphans=orphans,
+                                    allow_empty_first_page=allow_empty_first_page, cache_key=cache_key, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '').strip()
+        context['notes_version'] = self.notes_version
+        # {% cache %} with a timeout of 0 stores nothing.
+        context['notes_cache_timeout'] = settings.NOTES_CACHE_TIMEOUT if info_cache.enabled() else 0
+        context['preview_length'] = settings.NOTES_PREVIEW_LENGTH
+        return context
 
 class NoteDetailView(LoginRequiredMixin, DetailView):
-    model = Notes
+    model = Info
     template_name = 'notes_details.html' 
     context_object_name = 'note'
     login_url="/login"
 
     def get_queryset(self):
-        return self.request.user.notes.all()
+        return services.notes_for(self.request.user)
@@ -0,0 +1,185 @@
+import gzip
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Content-negotiated response compression, replacing GZipMiddleware. The
+# client's Accept-Encoding q-values pick among COMPRESSION_ENCODINGS (ties go
+# to the earlier entry); br and zstd are used when the brotli and zstandard
+# packages are installed. Responses under COMPRESSION_MIN_SIZE bytes are left
+# alone, and streaming responses are compressed chunk by chunk with a flush
+# after each chunk, so NDJSON progress events still arrive as they happen.
+#
+# HTML pages embed CSRF tokens next to user input, so like GZipMiddleware
+# they only get gzip with a random-length filename in the header, which
+# blurs the length signal BREACH relies on.
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|x-ndjson|javascript|xml|yaml)|image/svg\+xml)'
+)
+
+
+class Codec:
+    name = None
+
+    def available(self):
+        return True
+
+    def level(self):
+        return settings.COMPRESSION_LEVELS[self.name]
+
+
+class Gzip(Codec):
+    name = 'gzip'
+
+    def compress(self, data, padded):
+        content = gzip.compress(data, compresslevel=self.level(), mtime=0)
+        if not padded:
+            return content
+        # Same header trick as django.utils.text.compress_string.
+        header = bytearray(content[:10])
+        header[3] = gzip.FNAME
+        filename = secrets.token_hex(secrets.randbelow(50) + 1).encode() + b'\x00'
+        return bytes(header) + filename + content[10:]
+
+    def compressor(self):
+        compressor = zlib.compressobj(self.level(), zlib.DEFLATED, 31)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class Brotli(Codec):
+    name = 'br'
+
+    def available(self):
+        return brotli is not None
+
+    def compress(self, data, padded):
+        return brotli.compress(data, quality=self.level())
+
+    def compressor(self):
+        compressor = brotli.Compressor(quality=self.level())
+        return compressor.process, compressor.flush, compressor.finish
+
+
+class Zstd(Codec):
+    name = 'zstd'
+
+    def available(self):
+        return zstandard is not None
+
+    def compress(self, data, padded):
+        return zstandard.ZstdCompressor(level=self.level()).compress(data)
+
+    def compressor(self):
+        compressor = zstandard.ZstdCompressor(level=self.level()).compressobj()
+        return (
+            compressor.compress,
+            lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+CODECS = {codec.name: codec for codec in (Zstd(), Brotli(), Gzip())}
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(header, html=False):
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for name in settings.COMPRESSION_ENCODINGS:
+        codec = CODECS[name]
+        if not codec.available() or (html and name != 'gzip'):
+            continue
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def compress_chunks(codec, chunks):
+    compress, flush, finish = codec.compressor()
+    for chunk in chunks:
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+async def acompress_chunks(codec, chunks):
+    compress, flush, finish = codec.compressor()
+    async for chunk in chunks:
+        data = compress(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.has_header('Content-Encoding') or 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not COMPRESSIBLE_TYPES.match(content_type):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        html = content_type.startswith('text/html')
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), html=html)
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_chunks(codec, response.streaming_content)
+            else:
+                response.streaming_content = compress_chunks(codec, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            content = codec.compress(response.content, padded=html)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        # As in GZipMiddleware: the compressed body is a different
+        # representation, so strong ETags become weak (see
+        # api.conditional.evaluate for If-Match).
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codec.name
+        return response
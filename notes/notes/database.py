@@ -0,0 +1,42 @@
+import os
+
+import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
+
+# Builds DATABASES['default'] from DATABASE_URL and the DB_* environment.
+#
+# By default connections persist for DB_CONN_MAX_AGE seconds and are
+# health-checked before reuse (DB_CONN_HEALTH_CHECKS), so a request no
+# longer pays for a new PostgreSQL connection and a dead one is replaced
+# instead of failing the request. Persistent connections are per thread, so
+# under ASGI (or many threads) set DB_POOL=True instead: Django's psycopg 3
+# pool shares DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections across threads
+# and checks each one when it is handed out.
+
+
+def database_config(url, env=os.environ):
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=int(env.get("DB_CONN_MAX_AGE", 60)),
+        conn_health_checks=env.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
+    )
+    if env.get("DB_POOL", "False") != "True":
+        return config
+
+    if config['ENGINE'] != 'django.db.backends.postgresql':
+        raise ImproperlyConfigured("DB_POOL is only supported for PostgreSQL.")
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        raise ImproperlyConfigured("DB_POOL requires psycopg 3 with its pool (pip install 'psycopg[pool]').")
+
+    # The pool replaces persistent connections; Django rejects both at once.
+    config['CONN_MAX_AGE'] = 0
+    config['CONN_HEALTH_CHECKS'] = False
+    config.setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(env.get("DB_POOL_MIN_SIZE", 2)),
+        'max_size': int(env.get("DB_POOL_MAX_SIZE", 10)),
+        'timeout': float(env.get("DB_POOL_TIMEOUT", 10)),
+        'check': ConnectionPool.check_connection,
+    }
+    return config
@@ -0,0 +1,151 @@
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.backends.signals import connection_created
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Text compressed at rest. On SQLite, values of COMPRESSED_TEXT_MIN_SIZE
+# characters or more are written as a BLOB: a two-byte marker naming the
+# codec, then the compressed UTF-8. Shorter values, and values that would
+# not shrink, stay plain TEXT, and reads accept either form, so existing
+# rows keep working until compress_notes rewrites them.
+#
+# SQL that reads the column directly (the FTS5 triggers and snippets,
+# previews) goes through the notes_decompress() function registered on every
+# SQLite connection, or through Decompressed() in the ORM. PostgreSQL already
+# compresses large values through TOAST and its full-text index needs real
+# text, so there the field stores plain text and the SetColumnCompression
+# migration operation switches the column to lz4. Other backends' text
+# columns cannot hold binary values and are left alone.
+
+MARKER = b'\x00'
+
+
+class Codec:
+    name = None
+    tag = None
+
+    def available(self):
+        return True
+
+
+class Zlib(Codec):
+    name = 'zlib'
+    tag = b'z'
+
+    def compress(self, data):
+        return zlib.compress(data, 6)
+
+    def decompress(self, data, limit=None):
+        if limit is None:
+            return zlib.decompress(data)
+        # Feed small pieces: with max_length zlib would copy the whole
+        # unconsumed input.
+        decompressor, parts, size = zlib.decompressobj(), [], 0
+        for start in range(0, len(data), 4096):
+            part = decompressor.decompress(data[start:start + 4096])
+            parts.append(part)
+            size += len(part)
+            if size >= limit:
+                break
+        return b''.join(parts)[:limit]
+
+
+class Zstd(Codec):
+    name = 'zstd'
+    tag = b's'
+
+    def available(self):
+        return zstandard is not None
+
+    def compress(self, data):
+        # The frame records the content size, so reads allocate once.
+        return zstandard.ZstdCompressor(level=3, write_content_size=True).compress(data)
+
+    def decompress(self, data, limit=None):
+        if zstandard is None:
+            raise ImproperlyConfigured("Reading zstd-compressed text requires the zstandard package.")
+        if limit is None:
+            return zstandard.ZstdDecompressor().decompress(data)
+        # Accepts a truncated frame, see Decompressed.
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)[:limit]
+
+
+CODECS = {codec.name: codec for codec in (Zlib(), Zstd())}
+BY_TAG = {codec.tag: codec for codec in CODECS.values()}
+
+
+def compress(value):
+    # Returns the stored form of ``value``: marked, compressed bytes, or the
+    # string itself when compressing would not make it smaller.
+    codec = CODECS[settings.COMPRESSED_TEXT_CODEC]
+    if not codec.available():
+        raise ImproperlyConfigured(f"COMPRESSED_TEXT_CODEC {codec.name!r} is not installed.")
+    data = value.encode()
+    stored = MARKER + codec.tag + codec.compress(data)
+    return stored if len(stored) < len(data) else value
+
+
+def decompress(value, limit=None):
+    # Inverse of compress(); plain strings pass through. With ``limit``,
+    # only enough is decompressed for the first ``limit`` characters.
+    if not isinstance(value, (bytes, memoryview)):
+        return value if limit is None or value is None else value[:limit]
+    value = memoryview(value)
+    codec, data = BY_TAG[value[1:2].tobytes()], value[2:]
+    if limit is None:
+        return codec.decompress(data).decode()
+    # A character is at most four bytes of UTF-8.
+    return codec.decompress(data, 4 * limit).decode(errors='ignore')[:limit]
+
+
+def install(connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('notes_decompress', -1, decompress, deterministic=True)
+
+
+connection_created.connect(install)
+
+
+class Decompressed(models.Func):
+    # The column as text in SQL, e.g. Substr(Decompressed('text'), 1, 100).
+    # With ``limit``, SQLite only decompresses the first ``limit`` characters.
+    output_field = models.TextField()
+
+    def __init__(self, expression, limit=None):
+        super().__init__(expression)
+        self.limit = limit
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column, params = compiler.compile(self.source_expressions[0])
+        if connection.vendor != 'sqlite':
+            return column, params
+        if self.limit is None:
+            call, call_params = f'notes_decompress({column})', params
+        else:
+            # Neither codec expands data by more than a few bytes per block,
+            # so this prefix of the stream holds the first ``limit``
+            # characters and the rest of the value never leaves SQLite.
+            call = f'notes_decompress(substr({column}, 1, %s), %s)'
+            call_params = (*params, 4 * self.limit + 64, self.limit)
+        # Plain text never has to be copied into Python.
+        return f"CASE WHEN typeof({column}) = 'blob' THEN {call} ELSE {column} END", (*params, *call_params, *params)
+
+
+class CompressedTextField(models.TextField):
+
+    def from_db_value(self, value, expression, connection):
+        return decompress(value)
+
+    def get_db_prep_save(self, value, connection):
+        value = super().get_db_prep_save(value, connection)
+        if connection.vendor == 'sqlite' and isinstance(value, str) \
+                and len(value) >= settings.COMPRESSED_TEXT_MIN_SIZE:
+            return compress(value)
+        return value
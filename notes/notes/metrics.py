@@ -0,0 +1,248 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_safe
+
+# Per-view request metrics. Every request is counted and timed (two clock
+# reads); a METRICS_SAMPLE_RATE fraction is also broken down into database,
+# serializer and render time and gets a Server-Timing header. The numbers are
+# kept per process, so each worker is scraped on its own.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGES = ('db', 'serializer', 'render')
+
+_sample = ContextVar('metrics_sample', default=None)
+
+
+class Sample:
+    __slots__ = ('queries', 'db', 'serializer', 'render')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.serializer = self.render = 0.0
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+class ViewStats:
+    __slots__ = ('buckets', 'duration', 'count', 'bytes', 'sampled', 'queries', 'db', 'serializer', 'render')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.duration = 0.0
+        self.count = self.bytes = self.sampled = self.queries = 0
+        self.db = self.serializer = self.render = 0.0
+
+
+class Registry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.views = {}
+        self.requests = {}
+        self.cache = {}
+
+    def observe(self, view, method, status, duration, size, cache_result, sample):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = ViewStats()
+            stats.count += 1
+            stats.duration += duration
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+                    break
+            if size is not None:
+                stats.bytes += size
+            if sample is not None:
+                stats.sampled += 1
+                stats.queries += sample.queries
+                stats.db += sample.db
+                stats.serializer += sample.serializer
+                stats.render += sample.render
+
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if cache_result:
+                key = (view, cache_result)
+                self.cache[key] = self.cache.get(key, 0) + 1
+
+    def render(self):
+        with self.lock:
+            views = sorted(self.views.items())
+            requests = sorted(self.requests.items())
+            cache = sorted(self.cache.items())
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('notes_requests_total', 'counter', 'Requests handled, by view, method and status.')
+        for (view, method, status), count in requests:
+            lines.append(f'notes_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+
+        family('notes_request_duration_seconds', 'histogram', 'Wall time spent in Django per request.')
+        for view, stats in views:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(f'notes_request_duration_seconds_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'notes_request_duration_seconds_bucket{{view="{view}",le="+Inf"}} {stats.count}')
+            lines.append(f'notes_request_duration_seconds_sum{{view="{view}"}} {stats.duration:.6f}')
+            lines.append(f'notes_request_duration_seconds_count{{view="{view}"}} {stats.count}')
+
+        family('notes_response_bytes_total', 'counter', 'Response body bytes, where the size is known up front.')
+        for view, stats in views:
+            lines.append(f'notes_response_bytes_total{{view="{view}"}} {stats.bytes}')
+
+        # Stage totals only cover sampled requests; divide by
+        # notes_sampled_requests_total for per-request averages.
+        family('notes_sampled_requests_total', 'counter', 'Requests broken down into stages.')
+        for view, stats in views:
+            lines.append(f'notes_sampled_requests_total{{view="{view}"}} {stats.sampled}')
+        family('notes_db_queries_total', 'counter', 'Database queries run by sampled requests.')
+        for view, stats in views:
+            lines.append(f'notes_db_queries_total{{view="{view}"}} {stats.queries}')
+        family('notes_stage_seconds_total', 'counter', 'Time spent in database, serializer and render stages by sampled requests.')
+        for view, stats in views:
+            for stage in STAGES:
+                lines.append(f'notes_stage_seconds_total{{view="{view}",stage="{stage}"}} {getattr(stats, stage):.6f}')
+
+        family('notes_cache_results_total', 'counter', 'Responses served from (HIT) or stored in (MISS) the response cache.')
+        for (view, result), count in cache:
+            lines.append(f'notes_cache_results_total{{view="{view}",result="{result}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _record_query(execute, sql, params, many, context):
+    sample = _sample.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.db += time.perf_counter() - start
+
+
+def install(connection, **kwargs):
+    # Execute wrappers live on the per-thread connection object, so every
+    # connection gets the (cheap when not sampling) wrapper once.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install)
+
+
+@contextmanager
+def timed(stage):
+    sample = _sample.get()
+    if sample is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(sample, stage, getattr(sample, stage) + time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, sample, token = self.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.finish(request, response, start, sample)
+
+    async def __acall__(self, request):
+        start, sample, token = self.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _sample.reset(token)
+        return self.finish(request, response, start, sample)
+
+    def begin(self):
+        sample = Sample() if random.random() < settings.METRICS_SAMPLE_RATE else None
+        return time.perf_counter(), sample, _sample.set(sample)
+
+    def process_template_response(self, request, response):
+        # Called just before the handler renders a TemplateResponse (or a DRF
+        # Response); the callback runs right after it.
+        sample = _sample.get()
+        if sample is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                sample.render += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, start, sample):
+        # Streaming responses are timed up to the first byte only.
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        registry.observe(
+            view, request.method, response.status_code, duration, size,
+            response.get('X-Cache'), sample,
+        )
+        if sample is not None and settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = sample.server_timing(duration)
+        return response
+
+
+@require_safe
+def metrics_view(request):
+    # Per-view traffic is only public in DEBUG; otherwise a token is required.
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,171 @@
+from django.db import migrations
+from django.db.migrations.operations.base import Operation
+
+
+# CREATE INDEX CONCURRENTLY on PostgreSQL so large tables stay writable while
+# the index builds; other backends fall back to a plain CREATE INDEX.
+# Migrations using these operations must set atomic = False.
+class AddIndexConcurrently(migrations.AddIndex):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+
+# Full-text index over a table's title and text columns. SQLite gets an FTS5
+# table named <table>_fts kept in sync by triggers, so bulk writes stay
+# indexed too; PostgreSQL gets a GIN index on the same tsvector expression
+# that api.search.PostgresSearchBackend queries. Other backends are skipped.
+#
+# With decompress=True the text column may hold notes.fields compressed
+# values: on SQLite the triggers index notes_decompress(text) and the FTS5
+# table reads its content (for snippets and rebuilds) from a <table>_fts_content
+# view that decompresses as well.
+class CreateFullTextIndex(Operation):
+    reversible = True
+
+    def __init__(self, table, decompress=False):
+        self.table = table
+        self.decompress = decompress
+
+    def deconstruct(self):
+        kwargs = {'table': self.table}
+        if self.decompress:
+            kwargs['decompress'] = True
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Create full-text index on {self.table}'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        table, vendor = self.table, schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            content, text = table, '{row}.text'
+            if self.decompress:
+                content, text = f'{table}_fts_content', 'notes_decompress({row}.text)'
+                schema_editor.execute(
+                    f"CREATE VIEW {content} AS SELECT id, title, notes_decompress(text) AS text FROM {table}"
+                )
+            new, old = text.format(row='new'), text.format(row='old')
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5(title, text, content='{content}', content_rowid='id')"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {table}_fts(rowid, title, text) VALUES (new.id, new.title, {new}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {table}_fts({table}_fts, rowid, title, text) VALUES ('delete', old.id, old.title, {old}); END"
+            )
+            schema_editor.execute(
+                f"CREATE TRIGGER {table}_fts_update AFTER UPDATE OF title, text ON {table} BEGIN "
+                f"INSERT INTO {table}_fts({table}_fts, rowid, title, text) VALUES ('delete', old.id, old.title, {old}); "
+                f"INSERT INTO {table}_fts(rowid, title, text) VALUES (new.id, new.title, {new}); END"
+            )
+            schema_editor.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_fts ON {table} USING GIN "
+                f"(to_tsvector('english'::regconfig, COALESCE(title, '') || ' ' || COALESCE(text, '')))"
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        table, vendor = self.table, schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_fts_{trigger}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+            schema_editor.execute(f'DROP VIEW IF EXISTS {table}_fts_content')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {table}_fts')
+
+
+# Inverse of CreateFullTextIndex, for tables that are about to be dropped.
+# SQLite would otherwise leave the <table>_fts virtual table behind.
+class DropFullTextIndex(CreateFullTextIndex):
+
+    def describe(self):
+        return f'Drop full-text index on {self.table}'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+# Switches the SQLite full-text index of a table to (or back from) its
+# decompress=True form. PostgreSQL's index reads plain text either way.
+class DecompressFullTextIndex(Operation):
+    reversible = True
+
+    def __init__(self, table):
+        self.table = table
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [], {'table': self.table}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Index decompressed text on {self.table}'
+
+    def switch(self, schema_editor, from_state, to_state, decompress):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        CreateFullTextIndex(self.table, decompress=not decompress).database_backwards(
+            None, schema_editor, from_state, to_state)
+        CreateFullTextIndex(self.table, decompress=decompress).database_forwards(
+            None, schema_editor, from_state, to_state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self.switch(schema_editor, from_state, to_state, True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self.switch(schema_editor, from_state, to_state, False)
+
+
+# TOAST compression method for a PostgreSQL column (lz4 needs PostgreSQL 14).
+# Only values written afterwards use it; compress_notes rewrites the rest.
+# Other backends are skipped.
+class SetColumnCompression(Operation):
+    reversible = True
+
+    def __init__(self, table, column, method='lz4'):
+        self.table = table
+        self.column = column
+        self.method = method
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [], {'table': self.table, 'column': self.column, 'method': self.method}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def describe(self):
+        return f'Set {self.method} compression on {self.table}.{self.column}'
+
+    def set_compression(self, schema_editor, method):
+        connection = schema_editor.connection
+        if connection.vendor == 'postgresql' and connection.pg_version >= 140000:
+            schema_editor.execute(f'ALTER TABLE {self.table} ALTER COLUMN {self.column} SET COMPRESSION {method}')
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self.set_compression(schema_editor, self.method)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self.set_compression(schema_editor, 'default')
@@ -0,0 +1,156 @@
+import json
+import logging
+import re
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# Development and CI check for ORM regressions. With QUERY_WATCH set to
+# 'warn' or 'raise', every request (or ``watch()`` block) records its query
+# shapes: a shape repeated QUERY_WATCH_REPEAT times is reported as a likely
+# N+1, and any query slower than QUERY_WATCH_SLOW_MS as slow, each with the
+# application frames that issued it. 'warn' logs one JSON object per problem
+# on the ``notes.querywatch`` logger; 'raise' raises QueryProblem, which
+# fails the test that made the request. QUERY_WATCH_ALLOW maps a view name to
+# the problem kinds ('repeat', 'slow') it is allowed to have.
+
+logger = logging.getLogger('notes.querywatch')
+
+MODES = ('warn', 'raise')
+
+_watch = ContextVar('query_watch', default=None)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_VALUES = re.compile(r'VALUES \((?:[^()]|\([^()]*\))*\)(?:, \((?:[^()]|\([^()]*\))*\))*')
+
+
+class QueryProblem(AssertionError):
+    pass
+
+
+def shape(sql):
+    # Parameters are already placeholders; collapse IN lists and multi-row
+    # VALUES so batches of different sizes count as the same shape.
+    return _VALUES.sub('VALUES (...)', _IN_LIST.sub('IN (...)', sql))
+
+
+def app_stack():
+    frames = []
+    for frame in traceback.extract_stack()[:-3]:
+        if f'{settings.BASE_DIR}' in frame.filename and 'site-packages' not in frame.filename \
+                and not frame.filename.endswith('querywatch.py'):
+            frames.append(f'{frame.filename}:{frame.lineno} in {frame.name}')
+    return frames
+
+
+class Watch:
+
+    def __init__(self, view):
+        self.view = view
+        self.counts = {}
+        self.problems = []
+
+    def record(self, sql, duration):
+        key = shape(sql)
+        count = self.counts[key] = self.counts.get(key, 0) + 1
+        if count == settings.QUERY_WATCH_REPEAT:
+            self.problems.append({'kind': 'repeat', 'sql': key, 'stack': app_stack()})
+        if duration * 1000 >= settings.QUERY_WATCH_SLOW_MS:
+            self.problems.append({'kind': 'slow', 'sql': sql, 'ms': round(duration * 1000, 1), 'stack': app_stack()})
+
+    def report(self):
+        allowed = settings.QUERY_WATCH_ALLOW.get(self.view, ())
+        problems = []
+        for problem in self.problems:
+            if problem['kind'] in allowed:
+                continue
+            problem = dict(problem, view=self.view)
+            if problem['kind'] == 'repeat':
+                problem['count'] = self.counts[problem['sql']]
+            problems.append(problem)
+        if not problems:
+            return
+        if settings.QUERY_WATCH == 'raise':
+            raise QueryProblem('\n'.join(json.dumps(problem, indent=2) for problem in problems))
+        for problem in problems:
+            logger.warning(json.dumps(problem), extra={'query_problem': problem})
+
+
+def _record_query(execute, sql, params, many, context):
+    watch = _watch.get()
+    if watch is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        watch.record(sql, time.perf_counter() - start)
+
+
+def install(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(install)
+
+
+def enabled():
+    return settings.QUERY_WATCH in MODES
+
+
+@contextmanager
+def watch(view):
+    # Also usable outside requests, e.g. around a management command.
+    if not enabled():
+        yield None
+        return
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+    current = Watch(view)
+    token = _watch.set(current)
+    try:
+        yield current
+    finally:
+        _watch.reset(token)
+    current.report()
+
+
+class QueryWatchMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not enabled():
+            return self.get_response(request)
+        with watch(request.path) as current:
+            response = self.get_response(request)
+            self.name(current, request)
+        return response
+
+    async def __acall__(self, request):
+        if not enabled():
+            return await self.get_response(request)
+        with watch(request.path) as current:
+            response = await self.get_response(request)
+            self.name(current, request)
+        return response
+
+    def name(self, current, request):
+        # The view is only known after URL resolution. Streaming bodies are
+        # produced after this returns and are not watched.
+        if request.resolver_match:
+            current.view = request.resolver_match.view_name
@@ -1,8 +1,9 @@
-import dj_database_url
 from pathlib import Path
 from datetime import timedelta
 import os
 
+from .database import database_config
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "unsafe-dev-secret-key")
@@ -26,6 +27,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.metrics.MetricsMiddleware',
+    'notes.querywatch.QueryWatchMiddleware',
+    'notes.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -34,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.hashing.HashingBusyMiddleware',
 ]
 
 ROOT_URLCONF = 'notes.urls'
@@ -47,6 +52,7 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_REFRESH_SERIALIZER': 'api.revocation.RevocableTokenRefreshSerializer',
 }
 
 TEMPLATES = [
@@ -75,7 +81,44 @@ DATABASES = {
 
 database_url = os.environ.get("DATABASE_URL")
 if database_url:
-    DATABASES['default'] = dj_database_url.parse(database_url)
+    DATABASES['default'] = database_config(database_url)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # The refresh-token denylist (api.revocation): shared by all workers and
+    # never culled, so a revoked jti stays revoked until the token expires.
+    'revocation': {
+        'BACKEND': 'api.revocation.RevocationCache',
+        # Created by api/migrations/0007_revocation_cache_table.py.
+        'LOCATION': 'jwt_revocation_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+redis_url = os.environ.get("REDIS_URL")
+if redis_url:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': redis_url,
+    }
+    # Run Redis with maxmemory-policy noeviction so denylist keys are only
+    # removed by their own expiry.
+    CACHES['revocation'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': redis_url,
+        'KEY_PREFIX': 'revocation',
+    }
+
+# Must name a cache shared by all workers (REDIS_URL) for API responses and
+# the notes list fragments to be cached, see api.cache. A process-local
+# LocMemCache is only used when the app runs as one process (runserver,
+# tests, benchmarks).
+INFO_CACHE_ALIAS = 'default'
+INFO_CACHE_SINGLE_PROCESS = os.environ.get("INFO_CACHE_SINGLE_PROCESS", str(DEBUG)) == "True"
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND")
+INFO_CACHE_TIMEOUT = int(os.environ.get("INFO_CACHE_TIMEOUT", 300))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -94,13 +137,59 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
             'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get("LOGIN_IP_RATE", '30/min'),
+        'login_username': os.environ.get("LOGIN_USERNAME_RATE", '10/min'),
+        'register_ip': os.environ.get("REGISTER_IP_RATE", '10/hour'),
+    },
 }
 
+PASSWORD_HASHERS = [
+    'api.hashing.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_PROFILE = os.environ.get("PASSWORD_HASH_PROFILE", 'strong')
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 2 * PASSWORD_HASH_WORKERS))
+
+JWT_USER_CACHE_TTL = int(os.environ.get("JWT_USER_CACHE_TTL", 30))
+JWT_USER_CACHE_SIZE = 10000
+JWT_REVOCATION_CACHE_ALIAS = 'revocation'
+
+INFO_PAGE_SIZE = int(os.environ.get("INFO_PAGE_SIZE", 50))
+INFO_BULK_MAX_OPERATIONS = 500
+INFO_SYNC_SETTLE_SECONDS = 2
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+IMPORT_BATCH_SIZE = 1000
+NOTES_PAGE_SIZE = int(os.environ.get("NOTES_PAGE_SIZE", 24))
+NOTES_PREVIEW_LENGTH = 100
+NOTES_CACHE_TIMEOUT = int(os.environ.get("NOTES_CACHE_TIMEOUT", 300))
+IMPORT_MAX_ERRORS = 1000
+# Note bodies at or above this many characters are stored compressed on
+# SQLite (notes.fields); PostgreSQL compresses them with lz4 TOAST instead.
+COMPRESSED_TEXT_MIN_SIZE = int(os.environ.get("COMPRESSED_TEXT_MIN_SIZE", 2048))
+COMPRESSED_TEXT_CODEC = os.environ.get("COMPRESSED_TEXT_CODEC", "zlib")
+INFO_TOMBSTONE_RETENTION = timedelta(days=int(os.environ.get("INFO_TOMBSTONE_RETENTION_DAYS", 30)))
+# Revision history (api.revisions): a full snapshot every N revisions bounds
+# rebuilding a version to N - 1 deltas; compact_info_revisions drops deltas
+# older than the retention and keeps the snapshots.
+INFO_REVISION_SNAPSHOT_EVERY = int(os.environ.get("INFO_REVISION_SNAPSHOT_EVERY", 20))
+INFO_REVISION_PAGE_SIZE = 50
+INFO_REVISION_RETENTION = timedelta(days=int(os.environ.get("INFO_REVISION_RETENTION_DAYS", 90)))
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -111,8 +200,37 @@ SWAGGER_SETTINGS = {
     },
     'USE_SESSION_AUTH': False,
     'JSON_EDITOR': True,
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
 }
 
+API_SCHEMA_LIVE = os.environ.get("API_SCHEMA_LIVE", str(DEBUG)) == "True"
+API_SCHEMA_DIR = BASE_DIR / 'schema'
+API_SCHEMA_MAX_AGE = int(os.environ.get("API_SCHEMA_MAX_AGE", 60))
+
+COMPRESSION_ENCODINGS = ['zstd', 'br', 'gzip']
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_LEVELS = {
+    'gzip': int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6)),
+    'br': int(os.environ.get("COMPRESSION_BR_LEVEL", 4)),
+    'zstd': int(os.environ.get("COMPRESSION_ZSTD_LEVEL", 3)),
+}
+
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 0.1))
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", str(DEBUG)) == "True"
+# Required to scrape /metrics outside DEBUG.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Off unless set; the test runner defaults it to 'raise'.
+QUERY_WATCH = os.environ.get("QUERY_WATCH")
+QUERY_WATCH_REPEAT = int(os.environ.get("QUERY_WATCH_REPEAT", 3))
+QUERY_WATCH_SLOW_MS = int(os.environ.get("QUERY_WATCH_SLOW_MS", 100))
+QUERY_WATCH_ALLOW = {}
+TEST_RUNNER = 'notes.test_runner.QueryWatchRunner'
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryWatchRunner(DiscoverRunner):
+    # Tests fail on N+1 and slow queries unless QUERY_WATCH says otherwise.
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        if settings.QUERY_WATCH is None:
+            settings.QUERY_WATCH = 'raise'